@@ -3,13 +3,27 @@ import aws_cdk as cdk
 from odin_infrastructure.config import ODIN_AWS_ACCOUNT, ODIN_AWS_REGION
 
 from odin_infrastructure.odin_api_stack import OdinAPIStack
+from odin_infrastructure.odin_data_stack import OdinDataStack
+from odin_infrastructure.odin_edge_stack import OdinEdgeStack
+from odin_infrastructure.odin_load_test_stack import (
+    OdinLoadTestStack,
+    load_test_from_context,
+)
+from odin_infrastructure.odin_network_stack import OdinNetworkStack
+from odin_infrastructure.perf_lint import PerformanceChecks
 
 
 app = cdk.App()
-OdinAPIStack(
-    app,
-    "OdinAPIStack",
-    env=cdk.Environment(account=ODIN_AWS_ACCOUNT, region=ODIN_AWS_REGION),
-)
+cdk.Aspects.of(app).add(PerformanceChecks())
+env = cdk.Environment(account=ODIN_AWS_ACCOUNT, region=ODIN_AWS_REGION)
+network = OdinNetworkStack(app, "OdinNetworkStack", env=env)
+data = OdinDataStack(app, "OdinDataStack", network, env=env)
+api = OdinAPIStack(app, "OdinAPIStack", network, data, env=env)
+OdinEdgeStack(app, "OdinEdgeStack", api, env=env)
+load_test = load_test_from_context(app.node)
+if load_test is not None:
+    OdinLoadTestStack(
+        app, "OdinLoadTestStack", network, data, api, settings=load_test, env=env
+    )
 
 app.synth()
@@ -5,10 +5,10 @@ from aws_cdk import aws_iam as iam
 from aws_cdk import aws_logs as logs
 from constructs import Construct
 
-from .config import (
-    ODIN_AWS_REGION,
-    ODIN_KEY_PAIR,
-)
+from .architecture import amazon_linux_2, instance_type_for, mongodb_repo_arch
+from .cloudwatch_agent import cloudwatch_agent_commands
+from .config import ODIN_KEY_PAIR
+from .host_configuration import add_host_configuration
 
 LOG_GROUP = "/Odin/Admin"
 
@@ -21,6 +21,8 @@ class AdminInstance(ec2.Instance):
         vpc: ec2.IVpc,
         public_zone: aws_route53.IHostedZone,
         private_zone: aws_route53.IHostedZone,
+        instance_type: str = "t3.nano",
+        architecture: ec2.InstanceArchitecture = ec2.InstanceArchitecture.X86_64,
     ) -> None:
         vpc_subnets = ec2.SubnetSelection(subnet_type=ec2.SubnetType.PUBLIC)
         security_group = ec2.SecurityGroup(scope, "OdinAdminSecurityGroup", vpc=vpc)
@@ -35,37 +37,39 @@ class AdminInstance(ec2.Instance):
                 iam.ManagedPolicy.from_aws_managed_policy_name(
                     "CloudWatchLogsFullAccess"
                 ),
+                iam.ManagedPolicy.from_aws_managed_policy_name(
+                    "CloudWatchAgentServerPolicy"
+                ),
             ],
         )
         mongodb_repo = textwrap.dedent(
-            """
+            f"""
             [mongodb-org-6.0]
             name=MongoDB Repository
-            baseurl=https://repo.mongodb.org/yum/amazon/2/mongodb-org/6.0/x86_64/
+            baseurl=https://repo.mongodb.org/yum/amazon/2/mongodb-org/6.0/{mongodb_repo_arch(architecture)}/
             gpgcheck=1
             enabled=1
             gpgkey=https://www.mongodb.org/static/pgp/server-6.0.asc
             """
         )
+        configuration = cloudwatch_agent_commands(
+            LOG_GROUP,
+            {"/var/log/messages": "messages", "/var/log/secure": "secure"},
+        )
         user_data = ec2.UserData.for_linux()
         user_data.add_commands(
             f"echo '{mongodb_repo}' > /etc/yum.repos.d/mongodb-org-6.0.repo",
             "yum update -y",
-            "yum install -y mongodb-mongosh awslogs",
-            f"sed -i 's|region = us-east-1|region = {ODIN_AWS_REGION}|' /etc/awslogs/awscli.conf",
-            f"sed -i 's|#log_group_name = |log_group_name = {LOG_GROUP}|' /etc/awslogs/awslogs.conf",
-            "service awslogs start",
-            "chkconfig awslogs on",
+            "yum install -y mongodb-mongosh",
+            *configuration,
         )
         super().__init__(
             scope,
             id,
-            instance_type=ec2.InstanceType("t3.nano"),
-            machine_image=ec2.MachineImage.generic_linux(
-                {
-                    "eu-north-1": "ami-08fdff97845b0d82e",
-                }
+            instance_type=ec2.InstanceType(
+                instance_type_for(instance_type, architecture)
             ),
+            machine_image=amazon_linux_2(architecture),
             vpc=vpc,
             instance_name=id,
             key_name=ODIN_KEY_PAIR,
@@ -75,6 +79,9 @@ class AdminInstance(ec2.Instance):
             vpc_subnets=vpc_subnets,
         )
 
+        # User data only ran when the running host was built.
+        add_host_configuration(scope, "OdinAdminConfiguration", self, configuration)
+
         logs.LogGroup(
             scope,
             "OdinAdminLogGroup",
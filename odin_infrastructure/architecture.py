@@ -0,0 +1,84 @@
+import re
+
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_ecs as ecs
+from constructs import Node
+
+CONTEXT_KEY = "odin:architecture"
+ARCHITECTURES = {
+    "x86_64": ec2.InstanceArchitecture.X86_64,
+    "arm64": ec2.InstanceArchitecture.ARM_64,
+}
+# The AMI the x86 hosts were built from, kept so they are not replaced.
+X86_64_AMI = {"eu-north-1": "ami-08fdff97845b0d82e"}
+# Graviton family for each x86 family in use, sizes are kept as they are.
+GRAVITON_FAMILIES = {
+    "t3": "t4g",
+    "t3a": "t4g",
+    "c5": "c7g",
+    "c6i": "c7g",
+    "c6in": "c7gn",
+    "c7i": "c7g",
+    "m5": "m7g",
+    "m6i": "m7g",
+    "m7i": "m7g",
+    "r5": "r7g",
+    "r6i": "r7g",
+    "r7i": "r7g",
+}
+GRAVITON_FAMILY = re.compile(r"^[a-z]+\d+g[a-z]*$")
+
+
+def architecture_from_context(node: Node) -> ec2.InstanceArchitecture:
+    """Select the architecture with `-c odin:architecture=arm64`."""
+    name = node.try_get_context(CONTEXT_KEY) or "x86_64"
+    if name not in ARCHITECTURES:
+        raise ValueError(
+            f"Unknown architecture {name!r}, choose from {sorted(ARCHITECTURES)}"
+        )
+    return ARCHITECTURES[name]
+
+
+def instance_type_for(
+    instance_type: str, architecture: ec2.InstanceArchitecture
+) -> str:
+    """Translate an x86 instance type to the Graviton type of the same size."""
+    family, size = instance_type.split(".", 1)
+    if architecture == ec2.InstanceArchitecture.X86_64:
+        return instance_type
+    if GRAVITON_FAMILY.match(family):
+        return instance_type
+    if family not in GRAVITON_FAMILIES:
+        raise ValueError(f"No Graviton equivalent of {instance_type}")
+    return f"{GRAVITON_FAMILIES[family]}.{size}"
+
+
+def amazon_linux_2(architecture: ec2.InstanceArchitecture) -> ec2.IMachineImage:
+    if architecture == ec2.InstanceArchitecture.X86_64:
+        return ec2.MachineImage.generic_linux(X86_64_AMI)
+    # Cached in cdk.context.json so that a new AMI does not replace the hosts.
+    return ec2.MachineImage.latest_amazon_linux2(
+        cpu_type=ec2.AmazonLinuxCpuType.ARM_64,
+        cached_in_context=True,
+    )
+
+
+def mongodb_repo_arch(architecture: ec2.InstanceArchitecture) -> str:
+    if architecture == ec2.InstanceArchitecture.X86_64:
+        return "x86_64"
+    return "aarch64"
+
+
+def runtime_platform(
+    architecture: ec2.InstanceArchitecture,
+) -> ecs.RuntimePlatform | None:
+    """Fargate platform, None keeps the x86 default of existing tasks.
+
+    ARM64 tasks need images built for linux/arm64 (or multi-arch) in ECR.
+    """
+    if architecture == ec2.InstanceArchitecture.X86_64:
+        return None
+    return ecs.RuntimePlatform(
+        cpu_architecture=ecs.CpuArchitecture.ARM64,
+        operating_system_family=ecs.OperatingSystemFamily.LINUX,
+    )
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+
+from aws_cdk import Duration
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_elasticache as elasticache
+from aws_cdk import aws_route53
+from constructs import Construct
+
+CACHE_PORT = 6379
+
+
+@dataclass(frozen=True)
+class CacheSettings:
+    """Size of the shared Valkey cache used by the API tasks.
+
+    More than one shard switches the replication group to cluster mode, in
+    which case clients must connect to the configuration endpoint.
+    """
+
+    node_type: str = "cache.t4g.medium"
+    num_shards: int = 1
+    replicas_per_shard: int = 1
+    engine_version: str = "8.0"
+    transit_encryption: bool = True
+
+    @property
+    def cluster_mode(self) -> bool:
+        return self.num_shards > 1
+
+
+class OdinCache(elasticache.CfnReplicationGroup):
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        vpc: ec2.IVpc,
+        zone: aws_route53.IHostedZone,
+        settings: CacheSettings = CacheSettings(),
+    ) -> None:
+        vpc_subnets = vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS)
+        subnet_group = elasticache.CfnSubnetGroup(
+            scope,
+            "OdinCacheSubnetGroup",
+            description="Odin API cache subnets",
+            subnet_ids=vpc_subnets.subnet_ids,
+        )
+        # No ingress by default, clients are let in with `connections`.
+        security_group = ec2.SecurityGroup(
+            scope,
+            "OdinCacheSecurityGroup",
+            vpc=vpc,
+            allow_all_outbound=False,
+        )
+        self.connections = ec2.Connections(
+            security_groups=[security_group],
+            default_port=ec2.Port.tcp(CACHE_PORT),
+        )
+        self.settings = settings
+
+        replicated = settings.replicas_per_shard > 0
+        parameter_group = f"default.valkey{settings.engine_version.split('.')[0]}"
+        if settings.cluster_mode:
+            parameter_group += ".cluster.on"
+
+        super().__init__(
+            scope,
+            id,
+            replication_group_description="Odin API shared cache",
+            engine="valkey",
+            engine_version=settings.engine_version,
+            cache_node_type=settings.node_type,
+            cache_parameter_group_name=parameter_group,
+            cluster_mode="enabled" if settings.cluster_mode else "disabled",
+            num_node_groups=settings.num_shards,
+            replicas_per_node_group=settings.replicas_per_shard,
+            automatic_failover_enabled=replicated or settings.cluster_mode,
+            multi_az_enabled=replicated,
+            at_rest_encryption_enabled=True,
+            transit_encryption_enabled=settings.transit_encryption,
+            port=CACHE_PORT,
+            cache_subnet_group_name=subnet_group.ref,
+            security_group_ids=[security_group.security_group_id],
+        )
+
+        if settings.cluster_mode:
+            self.endpoint_address = self.attr_configuration_end_point_address
+        else:
+            self.endpoint_address = self.attr_primary_end_point_address
+
+        aws_route53.CnameRecord(
+            scope,
+            "OdinCachePrivateAliasRecord",
+            zone=zone,
+            domain_name=self.endpoint_address,
+            record_name="cache.odin",
+            ttl=Duration.minutes(1),
+        )
@@ -0,0 +1,66 @@
+import json
+
+from .config import ODIN_AWS_REGION
+
+AGENT_CONFIG = "/opt/aws/amazon-cloudwatch-agent/etc/amazon-cloudwatch-agent.json"
+AGENT_CTL = "/opt/aws/amazon-cloudwatch-agent/bin/amazon-cloudwatch-agent-ctl"
+HOST_NAMESPACE = "Odin/Host"
+
+
+def cloudwatch_agent_commands(
+    log_group: str,
+    log_files: dict[str, str],
+    disk_paths: list[str] | None = None,
+) -> list[str]:
+    """Idempotent commands that install and configure the CloudWatch agent.
+
+    `log_files` maps file paths to stream names, streams are prefixed with the
+    instance id as the old awslogs setup did. Host metrics go to Odin/Host
+    with an InstanceId dimension.
+    """
+    config = {
+        "agent": {"metrics_collection_interval": 60, "region": ODIN_AWS_REGION},
+        "metrics": {
+            "namespace": HOST_NAMESPACE,
+            "append_dimensions": {"InstanceId": "${aws:InstanceId}"},
+            "aggregation_dimensions": [["InstanceId"]],
+            "metrics_collected": {
+                "cpu": {
+                    "measurement": ["usage_user", "usage_system", "usage_iowait"],
+                    "totalcpu": True,
+                },
+                "mem": {"measurement": ["used_percent"]},
+                "swap": {"measurement": ["used_percent"]},
+                "disk": {
+                    "measurement": ["used_percent"],
+                    "resources": disk_paths or ["/"],
+                },
+                "diskio": {
+                    "measurement": ["io_time", "read_bytes", "write_bytes"],
+                },
+                "netstat": {"measurement": ["tcp_established", "tcp_time_wait"]},
+            },
+        },
+        "logs": {
+            "logs_collected": {
+                "files": {
+                    "collect_list": [
+                        {
+                            "file_path": path,
+                            "log_group_name": log_group,
+                            "log_stream_name": f"{{instance_id}}/{stream}",
+                        }
+                        for path, stream in log_files.items()
+                    ]
+                }
+            }
+        },
+    }
+    return [
+        # Hosts built before the agent still run the deprecated awslogs.
+        "if rpm -q awslogs > /dev/null; then"
+        " service awslogs stop; chkconfig awslogs off; fi",
+        "yum install -y amazon-cloudwatch-agent",
+        f"cat > {AGENT_CONFIG} <<'EOF'\n{json.dumps(config, indent=2)}\nEOF",
+        f"{AGENT_CTL} -a fetch-config -m ec2 -s -c file:{AGENT_CONFIG}",
+    ]
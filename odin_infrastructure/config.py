@@ -6,4 +6,17 @@ ODIN_AVAILABILITY_ZONE = "eu-north-1a"
 ODIN_API_EIP = "eipalloc-085032752a6ae52dc"
 ODIN_CERTIFICATE_ARN = "arn:aws:acm:us-east-1:991049544436:certificate/3e5dee9f-8fab-4e12-a1e0-a2a192dd8895"
 ODIN_UI_BUCKET = "odin-smr-ui"
+ODIN_RESULTS_BUCKET = "odin-smr-results"
+ODIN_LOAD_TEST_BUCKET = "odin-smr-load-test-results"
 ODIN_DOMAIN_NAME = "odin-smr.org"
+ODIN_API_DOMAIN_NAME = "api.odin-smr.org"
+ODIN_DATA_BUCKETS = [
+    "odin-apriori",
+    "odin-era5",
+    "odin-osiris",
+    "odin-psql",
+    "odin-smr",
+    "odin-solar",
+    "odin-vds-data",
+    "odin-zpt",
+]
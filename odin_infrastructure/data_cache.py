@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+
+from aws_cdk import CfnOutput, RemovalPolicy, Stack
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_ecs as ecs
+from aws_cdk import aws_efs as efs
+from aws_cdk import aws_logs as logs
+
+from .grant_buckets import grant_read_buckets
+
+POPULATE_FAMILY = "OdinDataCachePopulate"
+# uid/gid the files are written and read as, whatever user the image runs.
+POSIX_ID = "1000"
+
+
+@dataclass(frozen=True)
+class DataCacheSettings:
+    """Shared EFS copy of the auxiliary data buckets.
+
+    `s3://<bucket>/<key>` is kept at `<mount_path>/<bucket>/<key>`, tasks get
+    the mount path in ODINAPI_DATA_CACHE and should fall back to S3 for files
+    that are missing. Entries of `sources` are bucket names or
+    `bucket/prefix`, they are synced by the populate task.
+    """
+
+    sources: tuple[str, ...] = (
+        "odin-apriori",
+        "odin-era5",
+        "odin-solar",
+        "odin-zpt",
+    )
+    mount_path: str = "/mnt/odin-data"
+    populate_image: str = "public.ecr.aws/aws-cli/aws-cli:2.17.0"
+
+    def __post_init__(self) -> None:
+        if not self.sources:
+            raise ValueError("The data cache needs at least one source")
+        if not self.mount_path.startswith("/"):
+            raise ValueError("mount_path must be absolute")
+
+    @property
+    def bucket_names(self) -> list[str]:
+        return sorted({source.split("/", 1)[0] for source in self.sources})
+
+
+class OdinDataCache(efs.FileSystem):
+    """EFS file system with elastic throughput holding the data cache.
+
+    The API mounts it read only through `access_point`. The one-off
+    `OdinDataCachePopulate` task definition syncs the sources into it; run
+    it with `aws ecs run-task` in the private subnets with the security
+    group from the `OdinDataCachePopulateSecurityGroup` output.
+    """
+
+    def __init__(
+        self,
+        scope: Stack,
+        id: str,
+        vpc: ec2.IVpc,
+        settings: DataCacheSettings = DataCacheSettings(),
+    ) -> None:
+        super().__init__(
+            scope,
+            id,
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(
+                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+            ),
+            throughput_mode=efs.ThroughputMode.ELASTIC,
+            performance_mode=efs.PerformanceMode.GENERAL_PURPOSE,
+            encrypted=True,
+            # Only holds copies of S3 objects.
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+        self.settings = settings
+        self.access_point = self.add_access_point(
+            "OdinDataCacheAccessPoint",
+            path="/odin-data",
+            posix_user=efs.PosixUser(uid=POSIX_ID, gid=POSIX_ID),
+            create_acl=efs.Acl(
+                owner_uid=POSIX_ID, owner_gid=POSIX_ID, permissions="755"
+            ),
+        )
+
+        populate_task = ecs.FargateTaskDefinition(
+            scope,
+            "OdinDataCachePopulateTask",
+            family=POPULATE_FAMILY,
+            cpu=1024,
+            memory_limit_mib=2048,
+        )
+        self.add_to_task(populate_task, read_only=False)
+        grant_read_buckets(scope, populate_task.task_role, settings.bucket_names)
+        sync = " && ".join(
+            f"aws s3 sync --only-show-errors s3://{source}"
+            f" {settings.mount_path}/{source}"
+            for source in settings.sources
+        )
+        container = populate_task.add_container(
+            "OdinDataCachePopulateContainer",
+            image=ecs.ContainerImage.from_registry(settings.populate_image),
+            entry_point=["/bin/sh", "-c"],
+            command=[sync],
+            logging=ecs.AwsLogDriver(
+                stream_prefix="OdinDataCachePopulate",
+                log_group=logs.LogGroup(
+                    scope,
+                    "OdinDataCacheLogGroup",
+                    log_group_name="/Odin/DataCache",
+                    removal_policy=RemovalPolicy.DESTROY,
+                    retention=logs.RetentionDays.ONE_MONTH,
+                ),
+            ),
+        )
+        container.add_mount_points(
+            ecs.MountPoint(
+                source_volume="odin-data",
+                container_path=settings.mount_path,
+                read_only=False,
+            )
+        )
+
+        populate_security_group = ec2.SecurityGroup(
+            scope, "OdinDataCachePopulateSecurityGroup", vpc=vpc
+        )
+        self.connections.allow_default_port_from(populate_security_group)
+        CfnOutput(
+            scope,
+            "OdinDataCachePopulateSecurityGroupId",
+            export_name="OdinDataCachePopulateSecurityGroup",
+            value=populate_security_group.security_group_id,
+        )
+
+    def add_to_task(
+        self, task_definition: ecs.TaskDefinition, read_only: bool = True
+    ) -> None:
+        """Add the cache as the `odin-data` volume of `task_definition`."""
+        task_definition.add_volume(
+            name="odin-data",
+            efs_volume_configuration=ecs.EfsVolumeConfiguration(
+                file_system_id=self.file_system_id,
+                transit_encryption="ENABLED",
+                authorization_config=ecs.AuthorizationConfig(
+                    access_point_id=self.access_point.access_point_id,
+                    iam="ENABLED",
+                ),
+            ),
+        )
+        if read_only:
+            self.grant_read(task_definition.task_role)
+        else:
+            self.grant_read_write(task_definition.task_role)
@@ -1,11 +1,18 @@
+from typing import cast
+
 from aws_cdk.aws_iam import IRole
 from aws_cdk import Stack
-from aws_cdk.aws_s3 import Bucket
+from aws_cdk.aws_s3 import Bucket, IBucket
 
 
 def grant_read_buckets(scope: Stack, taskrole: IRole, bucket_names: list[str]):
     for bucket_name in bucket_names:
-        bucket = Bucket.from_bucket_name(
-            scope=scope, id=f"Odin-{bucket_name}", bucket_name=bucket_name
+        id = f"Odin-{bucket_name}"
+        # Several task roles read the same buckets, import each one only once.
+        existing = scope.node.try_find_child(id)
+        bucket = (
+            cast(IBucket, existing)
+            if existing is not None
+            else Bucket.from_bucket_name(scope=scope, id=id, bucket_name=bucket_name)
         )
         bucket.grant_read(taskrole)
@@ -0,0 +1,44 @@
+from aws_cdk import Duration
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_ssm as ssm
+from constructs import Construct
+
+
+def add_host_configuration(
+    scope: Construct,
+    id: str,
+    instance: ec2.Instance,
+    commands: list[str],
+    timeout: Duration = Duration.minutes(30),
+) -> ssm.CfnAssociation:
+    """Run `commands` on `instance` now and on every deploy that changes them.
+
+    EC2 runs user data on the first boot only, so configuration in it never
+    reaches a host that is already running. This State Manager association
+    runs the same commands through SSM Run Command instead, after cloud-init
+    has finished on a new instance. The commands must be idempotent.
+
+    CloudFormation waits up to `timeout` for them to succeed, so a dependency
+    between two associations rolls a change out one host at a time.
+    """
+    instance.role.add_managed_policy(
+        iam.ManagedPolicy.from_aws_managed_policy_name("AmazonSSMManagedInstanceCore")
+    )
+    seconds = str(int(timeout.to_seconds()))
+    return ssm.CfnAssociation(
+        scope,
+        id,
+        name="AWS-RunShellScript",
+        association_name=id,
+        targets=[
+            ssm.CfnAssociation.TargetProperty(
+                key="InstanceIds", values=[instance.instance_id]
+            )
+        ],
+        parameters={
+            "commands": ["cloud-init status --wait > /dev/null", *commands],
+            "executionTimeout": [seconds],
+        },
+        wait_for_success_timeout_seconds=int(timeout.to_seconds()),
+    )
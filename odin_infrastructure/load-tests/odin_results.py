@@ -0,0 +1,69 @@
+"""Publish the stats of a distributed run from the Locust master.
+
+Every STATS_INTERVAL seconds a JSON line with the current totals goes to
+stdout, where the /Odin/LoadTest metric filters pick it up. When the run
+ends the CSV and HTML reports are uploaded to ODIN_RESULTS_BUCKET and the
+load test services are scaled back to zero.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import boto3
+import gevent
+from locust import events
+from locust.env import Environment
+from locust.runners import MasterRunner
+
+STATS_INTERVAL = 10
+REPORT_PREFIX = "/tmp/odin"
+
+
+def _print_stats(environment: Environment, scenario: str) -> None:
+    while True:
+        gevent.sleep(STATS_INTERVAL)
+        runner = environment.runner
+        if runner is None:
+            continue
+        total = environment.stats.total
+        print(
+            json.dumps(
+                {
+                    "event": "locustStats",
+                    "scenario": scenario,
+                    "users": runner.user_count,
+                    "rps": total.current_rps,
+                    "failRps": total.current_fail_per_sec,
+                    "p50": total.get_current_response_time_percentile(0.5) or 0,
+                    "p95": total.get_current_response_time_percentile(0.95) or 0,
+                    "p99": total.get_current_response_time_percentile(0.99) or 0,
+                }
+            ),
+            flush=True,
+        )
+
+
+@events.init.add_listener
+def on_init(environment: Environment, **kwargs) -> None:
+    if isinstance(environment.runner, MasterRunner):
+        gevent.spawn(_print_stats, environment, os.environ["ODIN_SCENARIO"])
+
+
+@events.quitting.add_listener
+def on_quitting(environment: Environment, **kwargs) -> None:
+    if not isinstance(environment.runner, MasterRunner):
+        return
+    run = f"{os.environ['ODIN_SCENARIO']}/{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}"
+    s3 = boto3.client("s3")
+    for report in Path(REPORT_PREFIX).parent.glob(Path(REPORT_PREFIX).name + "*"):
+        s3.upload_file(
+            str(report), os.environ["ODIN_RESULTS_BUCKET"], f"{run}/{report.name}"
+        )
+    print(json.dumps({"event": "locustResults", "run": run}), flush=True)
+    ecs = boto3.client("ecs")
+    for service in os.environ["ODIN_LOAD_TEST_SERVICES"].split(","):
+        ecs.update_service(
+            cluster=os.environ["ODIN_CLUSTER"], service=service, desiredCount=0
+        )
@@ -0,0 +1,37 @@
+"""Read traffic of the Odin web UI and scripted level 2 downloads."""
+
+import random
+
+from locust import FastHttpUser, between, task
+
+import odin_results  # noqa: F401
+
+PROJECT = "ALL-Strat-v3.0.0"
+FREQMODES = (1, 2, 13, 14, 19, 21)
+
+
+class OdinApiUser(FastHttpUser):
+    wait_time = between(1, 5)
+
+    @task(1)
+    def health_check(self) -> None:
+        self.client.get("/rest_api/health_check")
+
+    @task(2)
+    def projects(self) -> None:
+        self.client.get("/rest_api/v5/level2/projects/")
+
+    @task(4)
+    def freqmode_info(self) -> None:
+        date = f"2015-{random.randint(1, 12):02}-{random.randint(1, 28):02}"
+        self.client.get(
+            f"/rest_api/v5/freqmode_info/{date}/", name="/rest_api/v5/freqmode_info"
+        )
+
+    @task(8)
+    def level2_products(self) -> None:
+        freqmode = random.choice(FREQMODES)
+        self.client.get(
+            f"/rest_api/v5/level2/{PROJECT}/{freqmode}/products/",
+            name="/rest_api/v5/level2/products",
+        )
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from aws_cdk import Size
+from aws_cdk import aws_ecs as ecs
+from aws_cdk import aws_logs as logs
+from aws_cdk import aws_s3_assets as s3_assets
+from constructs import Construct
+
+FLUENT_BIT_CONFIG = Path(__file__).parent / "fluent-bit" / "odin-api.conf"
+
+
+@dataclass(frozen=True)
+class FireLensSettings:
+    """Fluent Bit log router in front of CloudWatch Logs.
+
+    Log lines that are JSON objects with `duration_field` (milliseconds) are
+    also published as the RequestDuration metric in `metrics_namespace`, with
+    the endpoint taken from `path_field` as dimension.
+    """
+
+    image: str = "public.ecr.aws/aws-observability/aws-for-fluent-bit:init-2.32.4"
+    duration_field: str = "duration_ms"
+    path_field: str = "path"
+    metrics_namespace: str = "Odin/API"
+
+
+@dataclass(frozen=True)
+class LogSettings:
+    """Log delivery of the API containers.
+
+    Non-blocking delivery buffers up to `max_buffer_size_mib` in the task and
+    drops lines when it is full, instead of blocking writes to stdout while
+    CloudWatch Logs is slow or throttling.
+    """
+
+    non_blocking: bool = True
+    max_buffer_size_mib: int = 25
+    firelens: FireLensSettings | None = None
+
+    def __post_init__(self) -> None:
+        if self.max_buffer_size_mib < 1:
+            raise ValueError("max_buffer_size_mib must be positive")
+
+    def aws_log_driver(
+        self, stream_prefix: str, log_group: logs.ILogGroup
+    ) -> ecs.LogDriver:
+        if not self.non_blocking:
+            return ecs.AwsLogDriver(stream_prefix=stream_prefix, log_group=log_group)
+        return ecs.AwsLogDriver(
+            stream_prefix=stream_prefix,
+            log_group=log_group,
+            mode=ecs.AwsLogDriverMode.NON_BLOCKING,
+            max_buffer_size=Size.mebibytes(self.max_buffer_size_mib),
+        )
+
+
+def api_log_driver(settings: LogSettings, log_group: logs.ILogGroup) -> ecs.LogDriver:
+    if settings.firelens is None:
+        return settings.aws_log_driver("OdinAPI", log_group)
+    return ecs.LogDrivers.firelens(options={})
+
+
+def add_log_router(
+    scope: Construct,
+    task_definition: ecs.TaskDefinition,
+    log_group: logs.ILogGroup,
+    settings: LogSettings,
+) -> s3_assets.Asset | None:
+    """Add the Fluent Bit router if configured, after the API container.
+
+    Returns the config asset, the init image downloads it from S3 when the
+    task starts.
+    """
+    if settings.firelens is None:
+        return None
+
+    config = s3_assets.Asset(scope, "OdinLogRouterConfig", path=str(FLUENT_BIT_CONFIG))
+    config.grant_read(task_definition.task_role)
+    log_group.grant_write(task_definition.task_role)
+    task_definition.add_firelens_log_router(
+        "OdinLogRouter",
+        image=ecs.ContainerImage.from_registry(settings.firelens.image),
+        firelens_config=ecs.FirelensConfig(type=ecs.FirelensLogRouterType.FLUENTBIT),
+        environment={
+            "aws_fluent_bit_init_s3_1": config.bucket.arn_for_objects(
+                config.s3_object_key
+            ),
+            "ODIN_LOG_GROUP": log_group.log_group_name,
+            "ODIN_DURATION_FIELD": settings.firelens.duration_field,
+            "ODIN_PATH_FIELD": settings.firelens.path_field,
+            "ODIN_METRICS_NAMESPACE": settings.firelens.metrics_namespace,
+        },
+        memory_reservation_mib=64,
+        logging=settings.aws_log_driver("OdinLogRouter", log_group),
+    )
+    return config
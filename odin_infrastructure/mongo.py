@@ -1,32 +1,400 @@
+import json
 import textwrap
+from dataclasses import dataclass
+from pathlib import Path
 
-from aws_cdk import RemovalPolicy
+from aws_cdk import Duration, RemovalPolicy, Stack
+from aws_cdk import aws_cloudwatch as cloudwatch
 from aws_cdk import aws_ec2 as ec2
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_logs as logs
 from aws_cdk import aws_route53
+from aws_cdk import aws_secretsmanager as secretsmanager
+from aws_cdk import custom_resources
 from constructs import Construct
 
+from .architecture import amazon_linux_2, instance_type_for, mongodb_repo_arch
+from .cloudwatch_agent import cloudwatch_agent_commands
 from .config import (
     ODIN_AVAILABILITY_ZONE,
     ODIN_AWS_REGION,
     ODIN_KEY_PAIR,
     ODIN_MONGO_DATA_VOLUME,
 )
+from .host_configuration import add_host_configuration
+from .sizing import instance_memory_gib
 
 LOG_GROUP = "/Odin/Mongo"
+METRICS_NAMESPACE = "Odin/Mongo"
+MONGO_PORT = 27017
+KEYFILE = "/etc/mongod.keyfile"
+DATA_PATH = "/data/mongodb"
+MONGOD_LOG = "/var/log/mongodb/mongod.log"
+BLOCK_COMPRESSORS = ("none", "snappy", "zlib", "zstd")
+PROFILING_MODES = ("off", "slowOp", "all")
+SERVER_STATUS_SCRIPT = Path(__file__).parent / "scripts" / "mongo_server_status.js"
+# Credentials of the existing Odin mongo user, for tooling run on the hosts.
+MONGO_CREDENTIALS = [
+    "MONGO_USER=$(aws ssm get-parameter --region"
+    f" {ODIN_AWS_REGION} --name /odin/mongo/user"
+    " --query Parameter.Value --output text)",
+    "MONGO_PASSWORD=$(aws ssm get-parameter --region"
+    f" {ODIN_AWS_REGION} --name /odin/mongo/password --with-decryption"
+    " --query Parameter.Value --output text)",
+]
+MONGOSH = (
+    'mongosh --quiet -u "$MONGO_USER" -p "$MONGO_PASSWORD"'
+    " --authenticationDatabase admin"
+)
+READ_PREFERENCES = (
+    "primary",
+    "primaryPreferred",
+    "secondary",
+    "secondaryPreferred",
+    "nearest",
+)
+# CloudFormation/EC2 API names of the volume types that make sense for mongod.
+SSD_VOLUME_TYPES = {
+    ec2.EbsDeviceVolumeType.GP2: "gp2",
+    ec2.EbsDeviceVolumeType.GP3: "gp3",
+    ec2.EbsDeviceVolumeType.IO1: "io1",
+    ec2.EbsDeviceVolumeType.IO2: "io2",
+}
+
+
+@dataclass(frozen=True)
+class ReplicaSetSettings:
+    """Run mongod as a replica set instead of a single instance.
+
+    Member 0 is the existing instance with the existing data volume, the other
+    members get new volumes and do an initial sync from it.
+    """
+
+    name: str = "odin"
+    members: int = 3
+    read_preference: str = "secondaryPreferred"
+    data_volume_size_gib: int = 500
+
+    def __post_init__(self) -> None:
+        if self.members < 1:
+            raise ValueError("A replica set needs at least one member")
+        if self.read_preference not in READ_PREFERENCES:
+            raise ValueError(f"Unknown readPreference {self.read_preference!r}")
+
+    def member_host(self, index: int) -> str:
+        return f"mongo{index}.odin"
+
+
+@dataclass(frozen=True)
+class MongoStorageProfile:
+    """EBS and filesystem tuning for the mongod data volume.
+
+    With `volume_type` set the existing data volume is modified in place
+    (ModifyVolume, at most once per six hours) and new replica set members get
+    the same type, IOPS and throughput. None leaves the existing volume as it
+    is. The data volume is always mounted with noatime and `readahead_sectors`
+    (512 byte sectors, MongoDB recommends 8-32 for WiredTiger), kept across
+    reboots by a udev rule. Both are applied to the running hosts on deploy.
+    Only fresh volumes are formatted as XFS, the existing ext4 data volume is
+    mounted as it is and not migrated.
+    """
+
+    volume_type: ec2.EbsDeviceVolumeType | None = None
+    iops: int | None = None
+    throughput_mibps: int | None = None
+    readahead_sectors: int = 16
+    queue_length_alarm_threshold: float = 4
+    burst_balance_alarm_threshold: float = 20
+
+    def __post_init__(self) -> None:
+        if self.volume_type is not None and self.volume_type not in SSD_VOLUME_TYPES:
+            raise ValueError(f"Unsupported data volume type {self.volume_type}")
+        provisioned = (
+            ec2.EbsDeviceVolumeType.IO1,
+            ec2.EbsDeviceVolumeType.IO2,
+        )
+        if self.volume_type in provisioned and self.iops is None:
+            raise ValueError(f"{self.volume_type} volumes need explicit iops")
+        if (
+            self.throughput_mibps is not None
+            and self.volume_type != ec2.EbsDeviceVolumeType.GP3
+        ):
+            raise ValueError("Throughput can only be set for gp3 volumes")
+        if self.volume_type is None and (self.iops or self.throughput_mibps):
+            raise ValueError("iops and throughput need a volume_type")
+        if not 8 <= self.readahead_sectors <= 256:
+            raise ValueError("readahead_sectors should be between 8 and 256")
+
+
+@dataclass(frozen=True)
+class MongodConfig:
+    """Settings rendered into /etc/mongod.conf.
+
+    Without `cache_size_gb` the WiredTiger cache is `cache_memory_fraction` of
+    the instance memory less 1 GB, the mongod default formula made explicit so
+    it follows the instance type. `block_compressor` only applies to
+    collections created after the change. Operations slower than
+    `slow_op_threshold_ms` are logged as "Slow query" whatever the profiling
+    mode, and counted per collection in Odin/Mongo. A deploy that changes the
+    rendered file applies it to the running hosts and restarts mongod.
+    """
+
+    cache_size_gb: float | None = None
+    cache_memory_fraction: float = 0.5
+    block_compressor: str = "zstd"
+    max_incoming_connections: int = 4000
+    slow_op_threshold_ms: int = 100
+    slow_op_sample_rate: float = 1.0
+    profiling_mode: str = "off"
+
+    def __post_init__(self) -> None:
+        if self.block_compressor not in BLOCK_COMPRESSORS:
+            raise ValueError(f"Unknown block compressor {self.block_compressor!r}")
+        if self.profiling_mode not in PROFILING_MODES:
+            raise ValueError(f"Unknown profiling mode {self.profiling_mode!r}")
+        if not 0 < self.cache_memory_fraction <= 0.8:
+            raise ValueError("cache_memory_fraction should be in (0, 0.8]")
+        if self.cache_size_gb is not None and self.cache_size_gb < 0.25:
+            raise ValueError("cache_size_gb must be at least 0.25")
+        if not 0 < self.slow_op_sample_rate <= 1:
+            raise ValueError("slow_op_sample_rate should be in (0, 1]")
+        if self.max_incoming_connections < 1:
+            raise ValueError("max_incoming_connections must be positive")
+
+    def wired_tiger_cache_gb(self, instance_type: str) -> float:
+        if self.cache_size_gb is not None:
+            return self.cache_size_gb
+        memory = instance_memory_gib(instance_type)
+        return max(0.25, round((memory - 1) * self.cache_memory_fraction, 1))
+
+
+def _render_yaml(value: dict, indent: int = 0) -> list[str]:
+    lines = []
+    for key, item in value.items():
+        if isinstance(item, dict):
+            lines.append(" " * indent + f"{key}:")
+            lines += _render_yaml(item, indent + 2)
+        elif isinstance(item, bool):
+            lines.append(" " * indent + f"{key}: {str(item).lower()}")
+        elif isinstance(item, str):
+            # Quoted, YAML would read e.g. `mode: off` as a boolean.
+            lines.append(" " * indent + f"{key}: {json.dumps(item)}")
+        else:
+            lines.append(" " * indent + f"{key}: {item}")
+    return lines
+
+
+def render_mongod_conf(
+    config: MongodConfig,
+    instance_type: str,
+    replica_set: ReplicaSetSettings | None = None,
+) -> str:
+    conf: dict = {
+        "systemLog": {
+            "destination": "file",
+            "logAppend": True,
+            "path": MONGOD_LOG,
+        },
+        "storage": {
+            "dbPath": DATA_PATH,
+            "wiredTiger": {
+                "engineConfig": {
+                    "cacheSizeGB": config.wired_tiger_cache_gb(instance_type),
+                },
+                "collectionConfig": {"blockCompressor": config.block_compressor},
+            },
+        },
+        "processManagement": {"timeZoneInfo": "/usr/share/zoneinfo"},
+        "net": {
+            "port": MONGO_PORT,
+            "bindIp": "0.0.0.0",
+            "maxIncomingConnections": config.max_incoming_connections,
+        },
+        "operationProfiling": {
+            "mode": config.profiling_mode,
+            "slowOpThresholdMs": config.slow_op_threshold_ms,
+            "slowOpSampleRate": config.slow_op_sample_rate,
+        },
+    }
+    if replica_set is not None:
+        conf["security"] = {"keyFile": KEYFILE}
+        conf["replication"] = {"replSetName": replica_set.name}
+    return "\n".join(_render_yaml(conf)) + "\n"
+
+
+def storage_commands(storage: MongoStorageProfile) -> list[str]:
+    """Mount the data volume with noatime and set its readahead.
+
+    Idempotent like `mongod_commands`, an already mounted volume is
+    remounted with the new options.
+    """
+    return [
+        f"sed -i '\\| {DATA_PATH} |d' /etc/fstab",
+        f"echo '/dev/sdf {DATA_PATH} auto defaults,noatime,nofail 0 2' >> /etc/fstab",
+        f"if mountpoint -q {DATA_PATH}; then mount -o remount,noatime {DATA_PATH};"
+        f" else mount {DATA_PATH}; fi",
+        # /dev/sdf is nvme1n1 on Nitro instances. blockdev applies the
+        # readahead now, the rule again on every boot.
+        'echo \'ACTION=="add|change", KERNEL=="nvme1n1|xvdf",'
+        f' RUN+="/sbin/blockdev --setra {storage.readahead_sectors} /dev/%k"\''
+        " > /etc/udev/rules.d/60-odin-mongo-readahead.rules",
+        f"blockdev --setra {storage.readahead_sectors} /dev/sdf",
+        f"chown mongod:mongod {DATA_PATH}",
+    ]
+
+
+def mongod_commands(
+    mongod_conf: str,
+    replica_set: ReplicaSetSettings | None = None,
+    keyfile_secret: secretsmanager.ISecret | None = None,
+    initiate: bool = False,
+) -> list[str]:
+    """Install mongod.conf and the keyfile, restart mongod if they changed.
+
+    Idempotent, run from user data on the first boot and through SSM on every
+    deploy that changes them, see `add_host_configuration`.
+    """
+    commands = [
+        "restart=0",
+        f"cat > /etc/mongod.conf.new <<'EOF'\n{mongod_conf}EOF",
+        "if ! cmp -s /etc/mongod.conf.new /etc/mongod.conf; then"
+        " mv /etc/mongod.conf.new /etc/mongod.conf; restart=1; fi",
+        "rm -f /etc/mongod.conf.new",
+    ]
+    if replica_set is not None and keyfile_secret is not None:
+        commands += [
+            f"aws secretsmanager get-secret-value --region {ODIN_AWS_REGION}"
+            f" --secret-id {keyfile_secret.secret_arn}"
+            f" --query SecretString --output text > {KEYFILE}.new",
+            f"if ! cmp -s {KEYFILE}.new {KEYFILE}; then"
+            f" install -m 400 -o mongod -g mongod {KEYFILE}.new {KEYFILE};"
+            " restart=1; fi",
+            f"rm -f {KEYFILE}.new",
+        ]
+    commands.append(
+        'if [ "$restart" = 1 ]; then service mongod restart;'
+        " else service mongod start; fi"
+    )
+    if replica_set is not None and initiate:
+        # Member 0 holds the data, so it is preferred as primary. The other
+        # members and their DNS records may not exist yet, so keep retrying
+        # until the exact marker shows that the set is up.
+        config = {
+            "_id": replica_set.name,
+            "members": [
+                {
+                    "_id": index,
+                    "host": f"{replica_set.member_host(index)}:{MONGO_PORT}",
+                    "priority": 2 if index == 0 else 1,
+                }
+                for index in range(replica_set.members)
+            ],
+        }
+        commands += [
+            *MONGO_CREDENTIALS,
+            f"for attempt in $(seq 60); do {MONGOSH} --eval"
+            " 'let ok; try { ok = rs.status().ok } catch (e) {"
+            f" ok = rs.initiate({json.dumps(config)}).ok }};"
+            ' print(ok === 1 ? "RS_OK" : "RS_FAIL")\''
+            " | grep -qx RS_OK && break; sleep 30; done",
+        ]
+    return commands
+
+
+def mongo_user_data(
+    data_device_is_new: bool,
+    configuration: list[str],
+    architecture: ec2.InstanceArchitecture = ec2.InstanceArchitecture.X86_64,
+) -> ec2.UserData:
+    mongodb_repo = textwrap.dedent(
+        f"""
+        [mongodb-org-6.0]
+        name=MongoDB Repository
+        baseurl=https://repo.mongodb.org/yum/amazon/2/mongodb-org/6.0/{mongodb_repo_arch(architecture)}/
+        gpgcheck=1
+        enabled=1
+        gpgkey=https://www.mongodb.org/static/pgp/server-6.0.asc
+        """
+    )
+    user_data = ec2.UserData.for_linux()
+    user_data.add_commands(
+        f"echo '{mongodb_repo}' > /etc/yum.repos.d/mongodb-org-6.0.repo",
+        "yum update -y",
+        "yum install -y mongodb-org",
+        "service mongod stop",
+        f"mkdir -p {DATA_PATH}",
+    )
+    if data_device_is_new:
+        user_data.add_commands("blkid /dev/sdf || mkfs -t xfs /dev/sdf")
+    user_data.add_commands(*configuration)
+    return user_data
+
+
+def monitoring_commands() -> list[str]:
+    """CloudWatch agent and serverStatus metrics of a Mongo host."""
+    return [
+        *cloudwatch_agent_commands(
+            LOG_GROUP,
+            {
+                "/var/log/messages": "messages",
+                MONGOD_LOG: "mongod",
+            },
+            disk_paths=["/", DATA_PATH],
+        ),
+        *server_status_metrics_commands(),
+    ]
+
+
+def server_status_metrics_commands() -> list[str]:
+    """Publish serverStatus counters to Odin/Mongo every minute from cron.
+
+    The mongo user needs the clusterMonitor role for serverStatus.
+    """
+    script = "/usr/local/bin/odin-mongo-metrics"
+    metadata = "http://169.254.169.254/latest"
+    publisher = "\n".join(
+        [
+            "#!/bin/bash",
+            "set -euo pipefail",
+            f'TOKEN=$(curl -s -X PUT {metadata}/api/token -H "X-aws-ec2-metadata-token-ttl-seconds: 60")',
+            f'export INSTANCE_ID=$(curl -s -H "X-aws-ec2-metadata-token: $TOKEN" {metadata}/meta-data/instance-id)',
+            *MONGO_CREDENTIALS,
+            f"aws cloudwatch put-metric-data --region {ODIN_AWS_REGION}"
+            f" --namespace {METRICS_NAMESPACE}"
+            f' --metric-data "$({MONGOSH} /usr/local/share/odin/server_status.js)"',
+        ]
+    )
+    return [
+        "mkdir -p /usr/local/share/odin",
+        "cat > /usr/local/share/odin/server_status.js <<'EOF'\n"
+        f"{SERVER_STATUS_SCRIPT.read_text()}EOF",
+        f"cat > {script} <<'EOF'\n{publisher}\nEOF",
+        f"chmod 755 {script}",
+        f"echo '* * * * * root {script}' > /etc/cron.d/odin-mongo-metrics",
+    ]
 
 
 class MongoInstance(ec2.Instance):
     def __init__(
-        self, scope: Construct, id: str, vpc: ec2.IVpc, zone: aws_route53.IHostedZone
+        self,
+        scope: Construct,
+        id: str,
+        vpc: ec2.IVpc,
+        zone: aws_route53.IHostedZone,
+        replica_set: ReplicaSetSettings | None = None,
+        instance_type: str = "t3.large",
+        storage: MongoStorageProfile = MongoStorageProfile(),
+        architecture: ec2.InstanceArchitecture = ec2.InstanceArchitecture.X86_64,
+        config: MongodConfig = MongodConfig(),
     ) -> None:
+        instance_type = instance_type_for(instance_type, architecture)
+        mongod_conf = render_mongod_conf(config, instance_type, replica_set)
         vpc_subnets = ec2.SubnetSelection(
             subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
         )
         security_group = ec2.SecurityGroup(scope, "OdinMongoSecurityGroup", vpc=vpc)
         security_group.add_ingress_rule(ec2.Peer.any_ipv4(), ec2.Port.tcp(22))
-        security_group.add_ingress_rule(ec2.Peer.any_ipv4(), ec2.Port.tcp(27017))
+        security_group.add_ingress_rule(ec2.Peer.any_ipv4(), ec2.Port.tcp(MONGO_PORT))
 
         # Create IAM role for EC2 instances
         role = iam.Role(
@@ -37,50 +405,64 @@ class MongoInstance(ec2.Instance):
                 iam.ManagedPolicy.from_aws_managed_policy_name(
                     "CloudWatchLogsFullAccess"
                 ),
+                iam.ManagedPolicy.from_aws_managed_policy_name(
+                    "CloudWatchAgentServerPolicy"
+                ),
             ],
         )
-        mongodb_repo = textwrap.dedent(
-            """
-            [mongodb-org-6.0]
-            name=MongoDB Repository
-            baseurl=https://repo.mongodb.org/yum/amazon/2/mongodb-org/6.0/x86_64/
-            gpgcheck=1
-            enabled=1
-            gpgkey=https://www.mongodb.org/static/pgp/server-6.0.asc
-            """
-        )
-        user_data = ec2.UserData.for_linux()
-        user_data.add_commands(
-            f"echo '{mongodb_repo}' > /etc/yum.repos.d/mongodb-org-6.0.repo",
-            "yum update -y",
-            "yum install -y mongodb-org awslogs",
-            "service mongod stop",
-            "mkdir -p /data/mongodb",
-            "mount /dev/sdf /data/mongodb",
-            "chown mongod:mongod /data/mongodb",
-            'sed -i "s|/var/lib/mongo|/data/mongodb|g" /etc/mongod.conf',
-            'sed -i "s|127.0.0.1|0.0.0.0|g" /etc/mongod.conf',
-            "service mongod start",
-            f"sed -i 's|region = us-east-1|region = {ODIN_AWS_REGION}|' /etc/awslogs/awscli.conf",
-            f"sed -i 's|#log_group_name = |log_group_name = {LOG_GROUP}|' /etc/awslogs/awslogs.conf",
-            "service awslogs start",
-            "chkconfig awslogs on",
+        role.add_to_policy(
+            iam.PolicyStatement(
+                actions=["ssm:GetParameter"],
+                resources=[
+                    Stack.of(scope).format_arn(
+                        service="ssm",
+                        resource="parameter",
+                        resource_name="odin/mongo/*",
+                    )
+                ],
+            )
         )
+
+        keyfile_secret: secretsmanager.ISecret | None = None
+        if replica_set is not None:
+            keyfile_secret = secretsmanager.Secret(
+                scope,
+                "OdinMongoKeyfile",
+                description="Shared keyfile for the Odin MongoDB replica set",
+                generate_secret_string=secretsmanager.SecretStringGenerator(
+                    password_length=756,
+                    exclude_punctuation=True,
+                ),
+            )
+            keyfile_secret.grant_read(role)
+
+        # The data volume must be mounted before mongod starts.
+        configuration = [
+            *storage_commands(storage),
+            *monitoring_commands(),
+            *mongod_commands(mongod_conf, replica_set, keyfile_secret, initiate=True),
+        ]
+        member_configuration = [
+            *storage_commands(storage),
+            *monitoring_commands(),
+            *mongod_commands(mongod_conf, replica_set, keyfile_secret),
+        ]
+        machine_image = amazon_linux_2(architecture)
         super().__init__(
             scope,
             id,
-            instance_type=ec2.InstanceType("t3.large"),
-            machine_image=ec2.MachineImage.generic_linux(
-                {
-                    "eu-north-1": "ami-08fdff97845b0d82e",
-                }
-            ),
+            instance_type=ec2.InstanceType(instance_type),
+            machine_image=machine_image,
             vpc=vpc,
             instance_name=id,
             key_name=ODIN_KEY_PAIR,
             role=role,
             security_group=security_group,
-            user_data=user_data,
+            user_data=mongo_user_data(
+                data_device_is_new=False,
+                configuration=configuration,
+                architecture=architecture,
+            ),
             vpc_subnets=vpc_subnets,
         )
         # Attach existing EBS volume to MongoDB EC2 instance
@@ -93,20 +475,52 @@ class MongoInstance(ec2.Instance):
 
         volume.grant_attach_volume(iam.ServicePrincipal("ec2.amazonaws.com"), [self])
         # attach large ebs volume
-        ec2.CfnVolumeAttachment(
+        attachment = ec2.CfnVolumeAttachment(
             scope,
             "OdinMongoVolumeAttachment",
             device="/dev/sdf",
             instance_id=self.instance_id,
             volume_id=ODIN_MONGO_DATA_VOLUME,
         )
-        logs.LogGroup(
+        if storage.volume_type is not None:
+            modify_volume = custom_resources.AwsSdkCall(
+                service="EC2",
+                action="modifyVolume",
+                parameters={
+                    "VolumeId": ODIN_MONGO_DATA_VOLUME,
+                    "VolumeType": SSD_VOLUME_TYPES[storage.volume_type],
+                    "Iops": storage.iops,
+                    "Throughput": storage.throughput_mibps,
+                },
+                physical_resource_id=custom_resources.PhysicalResourceId.of(
+                    ODIN_MONGO_DATA_VOLUME
+                ),
+            )
+            custom_resources.AwsCustomResource(
+                scope,
+                "OdinMongoVolumeModification",
+                on_create=modify_volume,
+                on_update=modify_volume,
+                policy=custom_resources.AwsCustomResourcePolicy.from_sdk_calls(
+                    resources=[
+                        Stack.of(scope).format_arn(
+                            service="ec2",
+                            resource="volume",
+                            resource_name=ODIN_MONGO_DATA_VOLUME,
+                        )
+                    ]
+                ),
+                install_latest_aws_sdk=False,
+            )
+        self._add_volume_alarms(scope, storage, instance_type)
+        log_group = logs.LogGroup(
             scope,
             "OdinMongoLogGroup",
-            log_group_name="/Odin/Mongo",
+            log_group_name=LOG_GROUP,
             removal_policy=RemovalPolicy.DESTROY,
             retention=logs.RetentionDays.SIX_MONTHS,
         )
+        self._add_slow_query_metrics(scope, log_group)
         aws_route53.ARecord(
             scope,
             "OdinMongoPrivateAliasRecord",
@@ -116,3 +530,186 @@ class MongoInstance(ec2.Instance):
             ),
             record_name="mongo.odin",
         )
+
+        self.replica_set = replica_set
+        self.members: list[ec2.Instance] = [self]
+        self.configurations = [
+            add_host_configuration(
+                scope,
+                "OdinMongoConfiguration",
+                self,
+                configuration,
+                # Initiating the set retries for up to 30 minutes.
+                timeout=Duration.hours(1),
+            )
+        ]
+        self.configurations[0].add_dependency(attachment)
+        if replica_set is None:
+            return
+
+        # Spread the additional members over the AZs of the private subnets.
+        subnets = vpc.select_subnets(
+            subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+        ).subnets
+        for index in range(1, replica_set.members):
+            member = ec2.Instance(
+                scope,
+                f"{id}{index}",
+                instance_type=ec2.InstanceType(instance_type),
+                machine_image=machine_image,
+                vpc=vpc,
+                instance_name=f"{id}{index}",
+                key_name=ODIN_KEY_PAIR,
+                role=role,
+                security_group=security_group,
+                user_data=mongo_user_data(
+                    data_device_is_new=True,
+                    configuration=member_configuration,
+                    architecture=architecture,
+                ),
+                vpc_subnets=ec2.SubnetSelection(
+                    subnets=[subnets[index % len(subnets)]]
+                ),
+                block_devices=[
+                    ec2.BlockDevice(
+                        device_name="/dev/sdf",
+                        volume=ec2.BlockDeviceVolume.ebs(
+                            replica_set.data_volume_size_gib,
+                            volume_type=storage.volume_type
+                            or ec2.EbsDeviceVolumeType.GP3,
+                            iops=storage.iops,
+                            throughput=storage.throughput_mibps,
+                            encrypted=True,
+                            delete_on_termination=False,
+                        ),
+                    )
+                ],
+            )
+            self.members.append(member)
+            self.configurations.append(
+                add_host_configuration(
+                    scope,
+                    f"OdinMongo{index}Configuration",
+                    member,
+                    member_configuration,
+                )
+            )
+        # Restart one member at a time, the secondaries before member 0,
+        # which then initiates the set.
+        ordered = self.configurations[1:] + self.configurations[:1]
+        for previous, following in zip(ordered, ordered[1:]):
+            following.add_dependency(previous)
+
+        for index, member in enumerate(self.members):
+            aws_route53.ARecord(
+                scope,
+                f"OdinMongo{index}PrivateAliasRecord",
+                zone=zone,
+                target=aws_route53.RecordTarget.from_ip_addresses(
+                    member.instance_private_ip,
+                ),
+                record_name=replica_set.member_host(index),
+            )
+
+    def _add_slow_query_metrics(
+        self, scope: Construct, log_group: logs.ILogGroup
+    ) -> None:
+        # mongod logs one structured line per slow operation, e.g.
+        # {"msg": "Slow query", "attr": {"ns": "odin.L2", "durationMillis": 231}}
+        slow_query = logs.FilterPattern.string_value("$.msg", "=", "Slow query")
+        logs.MetricFilter(
+            scope,
+            "OdinMongoSlowQueryFilter",
+            log_group=log_group,
+            filter_pattern=slow_query,
+            metric_namespace=METRICS_NAMESPACE,
+            metric_name="SlowQueries",
+            metric_value="1",
+            dimensions={"Collection": "$.attr.ns"},
+        )
+        logs.MetricFilter(
+            scope,
+            "OdinMongoSlowQueryDurationFilter",
+            log_group=log_group,
+            filter_pattern=slow_query,
+            metric_namespace=METRICS_NAMESPACE,
+            metric_name="SlowQueryDuration",
+            metric_value="$.attr.durationMillis",
+            dimensions={"Collection": "$.attr.ns"},
+            unit=cloudwatch.Unit.MILLISECONDS,
+        )
+
+    def _add_volume_alarms(
+        self, scope: Construct, storage: MongoStorageProfile, instance_type: str
+    ) -> None:
+        def ebs_metric(name: str, statistic: str) -> cloudwatch.Metric:
+            return cloudwatch.Metric(
+                namespace="AWS/EBS",
+                metric_name=name,
+                dimensions_map={"VolumeId": ODIN_MONGO_DATA_VOLUME},
+                statistic=statistic,
+                period=Duration.minutes(5),
+            )
+
+        cloudwatch.Alarm(
+            scope,
+            "OdinMongoVolumeQueueLengthAlarm",
+            alarm_description="Requests are queueing on the Mongo data volume",
+            metric=ebs_metric("VolumeQueueLength", "Average"),
+            threshold=storage.queue_length_alarm_threshold,
+            evaluation_periods=3,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+        # Only reported for gp2/st1/sc1 volumes, missing data is fine.
+        cloudwatch.Alarm(
+            scope,
+            "OdinMongoVolumeBurstBalanceAlarm",
+            alarm_description="The Mongo data volume is running out of burst credits",
+            metric=ebs_metric("BurstBalance", "Minimum"),
+            threshold=storage.burst_balance_alarm_threshold,
+            evaluation_periods=3,
+            comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_THRESHOLD,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+        if instance_type.startswith("t"):
+            cloudwatch.Alarm(
+                scope,
+                "OdinMongoCPUCreditBalanceAlarm",
+                alarm_description="The Mongo instance is running out of CPU credits",
+                metric=cloudwatch.Metric(
+                    namespace="AWS/EC2",
+                    metric_name="CPUCreditBalance",
+                    dimensions_map={"InstanceId": self.instance_id},
+                    statistic="Minimum",
+                    period=Duration.minutes(5),
+                ),
+                threshold=50,
+                evaluation_periods=3,
+                comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_THRESHOLD,
+            )
+
+    @property
+    def member_hosts(self) -> list[str]:
+        """host:port of every member, member 0 (the preferred primary) first."""
+        if self.replica_set is None:
+            return [f"mongo.odin:{MONGO_PORT}"]
+        return [
+            f"{self.replica_set.member_host(index)}:{MONGO_PORT}"
+            for index in range(self.replica_set.members)
+        ]
+
+    @property
+    def connection_string(self) -> str:
+        """Value for ODINAPI_MONGODB_HOST, pymongo accepts both forms.
+
+        Host names from the private zone, so replacing an instance does not
+        change a value exported to the API stack.
+        """
+        if self.replica_set is None:
+            return "mongo.odin"
+        hosts = ",".join(self.member_hosts)
+        return (
+            f"mongodb://{hosts}/?replicaSet={self.replica_set.name}"
+            f"&readPreference={self.replica_set.read_preference}"
+        )
@@ -0,0 +1,264 @@
+from aws_cdk import Duration
+from aws_cdk import aws_cloudwatch as cloudwatch
+from aws_cdk import aws_elasticloadbalancingv2 as elbv2
+from constructs import Construct
+
+from .cloudwatch_agent import HOST_NAMESPACE
+from .mongo import METRICS_NAMESPACE, MongoInstance
+from .odin_cluster import OdinService
+
+PERIOD = Duration.minutes(1)
+
+
+class OdinDashboard(cloudwatch.Dashboard):
+    """Performance overview of the API delivery path with alarms.
+
+    Covers ALB latency percentiles and errors, task count, the NAT instance
+    throughput and the health of every Mongo member.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        service: OdinService,
+        mongo: MongoInstance,
+        nat_instance_id: str,
+        max_capacity: int,
+        latency_alarm_seconds: float = 5,
+    ) -> None:
+        super().__init__(
+            scope,
+            id,
+            dashboard_name="Odin",
+            default_interval=Duration.hours(6),
+        )
+
+        target_metrics = service.target_group.metrics
+        latency = [
+            target_metrics.target_response_time(statistic=statistic, period=PERIOD)
+            for statistic in ("p50", "p90", "p99")
+        ]
+        target_5xx = target_metrics.http_code_target(
+            elbv2.HttpCodeTarget.TARGET_5XX_COUNT, period=PERIOD, statistic="Sum"
+        )
+        elb_5xx = service.load_balancer.metrics.http_code_elb(
+            elbv2.HttpCodeElb.ELB_5XX_COUNT, period=PERIOD, statistic="Sum"
+        )
+        running_tasks = cloudwatch.Metric(
+            namespace="ECS/ContainerInsights",
+            metric_name="RunningTaskCount",
+            dimensions_map={
+                "ClusterName": service.cluster.cluster_name,
+                "ServiceName": service.service.service_name,
+            },
+            statistic="Maximum",
+            period=PERIOD,
+        )
+
+        alarms = [
+            cloudwatch.Alarm(
+                scope,
+                "OdinApiLatencyAlarm",
+                alarm_description="p99 API response time is high",
+                metric=latency[2],
+                threshold=latency_alarm_seconds,
+                evaluation_periods=5,
+                datapoints_to_alarm=3,
+            ),
+            cloudwatch.Alarm(
+                scope,
+                "OdinApi5xxAlarm",
+                alarm_description="API tasks return 5xx responses",
+                metric=target_5xx,
+                threshold=10,
+                evaluation_periods=5,
+                datapoints_to_alarm=3,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            ),
+            cloudwatch.Alarm(
+                scope,
+                "OdinAlb5xxAlarm",
+                alarm_description="The load balancer returns 5xx responses",
+                metric=elb_5xx,
+                threshold=10,
+                evaluation_periods=5,
+                datapoints_to_alarm=3,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            ),
+            cloudwatch.Alarm(
+                scope,
+                "OdinApiAtMaxCapacityAlarm",
+                alarm_description="The API service is scaled out to max capacity",
+                metric=running_tasks,
+                threshold=max_capacity,
+                comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+                evaluation_periods=15,
+                datapoints_to_alarm=10,
+            ),
+        ]
+
+        def nat_metric(name: str) -> cloudwatch.Metric:
+            return cloudwatch.Metric(
+                namespace="AWS/EC2",
+                metric_name=name,
+                dimensions_map={"InstanceId": nat_instance_id},
+                statistic="Sum",
+                period=PERIOD,
+            )
+
+        def mongo_metric(
+            member_id: str, name: str, statistic: str = "Maximum"
+        ) -> cloudwatch.Metric:
+            return cloudwatch.Metric(
+                namespace=METRICS_NAMESPACE,
+                metric_name=name,
+                dimensions_map={"InstanceId": member_id},
+                statistic=statistic,
+                period=PERIOD,
+                label=f"{name} {member_id}",
+            )
+
+        mongo_widgets: list[cloudwatch.IWidget] = []
+        for index, member in enumerate(mongo.members):
+            member_id = member.instance_id
+            alarms.append(
+                cloudwatch.Alarm(
+                    scope,
+                    f"OdinMongoStatusCheckAlarm{index or ''}",
+                    alarm_description=f"Mongo member {index} fails status checks",
+                    metric=cloudwatch.Metric(
+                        namespace="AWS/EC2",
+                        metric_name="StatusCheckFailed",
+                        dimensions_map={"InstanceId": member_id},
+                        statistic="Maximum",
+                        period=PERIOD,
+                    ),
+                    threshold=1,
+                    comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+                    evaluation_periods=3,
+                )
+            )
+            alarms.append(
+                cloudwatch.Alarm(
+                    scope,
+                    f"OdinMongoQueueAlarm{index or ''}",
+                    alarm_description=f"Operations queue on Mongo member {index}",
+                    metric=cloudwatch.MathExpression(
+                        expression="readers + writers",
+                        using_metrics={
+                            "readers": mongo_metric(
+                                member_id, "GlobalLockQueueReaders"
+                            ),
+                            "writers": mongo_metric(
+                                member_id, "GlobalLockQueueWriters"
+                            ),
+                        },
+                        period=PERIOD,
+                    ),
+                    threshold=10,
+                    evaluation_periods=5,
+                    datapoints_to_alarm=3,
+                    # No data means the serverStatus publisher or mongod is down.
+                    treat_missing_data=cloudwatch.TreatMissingData.BREACHING,
+                )
+            )
+            opcounters = {
+                f"op{position}": mongo_metric(member_id, f"Opcounters{op}")
+                for position, op in enumerate(
+                    ("Query", "Getmore", "Insert", "Update", "Delete", "Command")
+                )
+            }
+            mongo_widgets += [
+                cloudwatch.GraphWidget(
+                    title=f"Mongo {index} operations/s",
+                    left=[
+                        cloudwatch.MathExpression(
+                            expression=f"RATE({key})",
+                            using_metrics={key: metric},
+                            label=metric.metric_name,
+                            period=PERIOD,
+                        )
+                        for key, metric in opcounters.items()
+                    ],
+                ),
+                cloudwatch.GraphWidget(
+                    title=f"Mongo {index} WiredTiger cache",
+                    left=[
+                        mongo_metric(member_id, "WiredTigerCacheBytes"),
+                        mongo_metric(member_id, "WiredTigerCacheDirtyBytes"),
+                        mongo_metric(member_id, "WiredTigerCacheMaxBytes"),
+                    ],
+                ),
+                cloudwatch.GraphWidget(
+                    title=f"Mongo {index} connections and queues",
+                    left=[
+                        mongo_metric(member_id, "ConnectionsCurrent"),
+                    ],
+                    right=[
+                        mongo_metric(member_id, "GlobalLockQueueReaders"),
+                        mongo_metric(member_id, "GlobalLockQueueWriters"),
+                        mongo_metric(member_id, "WiredTigerReadTicketsAvailable"),
+                    ],
+                ),
+                cloudwatch.GraphWidget(
+                    title=f"Mongo {index} host",
+                    left=[
+                        cloudwatch.Metric(
+                            namespace="AWS/EC2",
+                            metric_name="CPUUtilization",
+                            dimensions_map={"InstanceId": member_id},
+                            period=PERIOD,
+                        ),
+                        cloudwatch.Metric(
+                            namespace=HOST_NAMESPACE,
+                            metric_name="mem_used_percent",
+                            dimensions_map={"InstanceId": member_id},
+                            period=PERIOD,
+                        ),
+                    ],
+                    right=[
+                        cloudwatch.Metric(
+                            namespace=HOST_NAMESPACE,
+                            metric_name="cpu_usage_iowait",
+                            dimensions_map={"InstanceId": member_id},
+                            period=PERIOD,
+                        ),
+                    ],
+                ),
+            ]
+
+        self.add_widgets(
+            cloudwatch.AlarmStatusWidget(title="Alarms", alarms=alarms, width=24),
+        )
+        self.add_widgets(
+            cloudwatch.GraphWidget(
+                title="API response time (s)", left=latency, width=8
+            ),
+            cloudwatch.GraphWidget(
+                title="Requests and errors",
+                left=[
+                    target_metrics.request_count(period=PERIOD, statistic="Sum"),
+                ],
+                right=[target_5xx, elb_5xx],
+                width=8,
+            ),
+            cloudwatch.GraphWidget(
+                title="API tasks",
+                left=[running_tasks],
+                right=[
+                    service.service.metric_cpu_utilization(period=PERIOD),
+                    service.service.metric_memory_utilization(period=PERIOD),
+                ],
+                width=8,
+            ),
+        )
+        self.add_widgets(
+            cloudwatch.GraphWidget(
+                title="NAT instance throughput (bytes)",
+                left=[nat_metric("NetworkIn"), nat_metric("NetworkOut")],
+                right=[nat_metric("NetworkPacketsOut")],
+                width=24,
+            ),
+        )
+        self.add_widgets(*mongo_widgets)
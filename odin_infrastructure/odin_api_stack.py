@@ -1,85 +1,146 @@
-from aws_cdk import Duration, Stack
+from aws_cdk import Stack
 from aws_cdk import aws_ec2 as ec2
 from aws_cdk import aws_ecs as ecs
-from aws_cdk import aws_route53
+from aws_cdk import aws_s3 as s3
+from aws_cdk import aws_servicediscovery as servicediscovery
 from constructs import Construct
 
-from odin_infrastructure.odin_ui_cloudfront import OdinUICloudfront
-
-from .admin_host import AdminInstance
-from .config import ODIN_API_EIP
-from .mongo import MongoInstance
-from .odin_cluster import OdinService
+from .architecture import architecture_from_context
+from .config import ODIN_RESULTS_BUCKET
+from .log_routing import LogSettings
+from .observability import OdinDashboard
+from .odin_cluster import (
+    ApiDelivery,
+    OdinService,
+    PgBouncerSettings,
+    RolloutProfile,
+    ServiceConnectSettings,
+    ServiceScaling,
+)
+from .odin_data_stack import OdinDataStack
+from .odin_network_stack import OdinNetworkStack, lookup_public_zone
+from .result_store import ResultStoreSettings
+from .odin_worker import OdinWorkerService, WorkerSettings
+from .scheduled_tasks import MaintenanceSettings, add_maintenance_tasks
+from .sizing import SizingProfile, sizing_from_context
 
 
 class OdinAPIStack(Stack):
-    def __init__(self, scope: Construct, id: str, **kwargs) -> None:
-        super().__init__(scope, id, **kwargs)
+    """The API cluster and service, its dashboard and the optional worker.
 
-        nat_gateway_provider = ec2.NatProvider.instance(
-            instance_type=ec2.InstanceType("t3.small")
-        )
-        vpc: ec2.IVpc = ec2.Vpc(
-            self,
-            "OdinVPC",
-            nat_gateway_provider=nat_gateway_provider,
-            max_azs=2,
-            nat_gateways=1,
-            vpc_name="OdinVPC",
-            subnet_configuration=[
-                ec2.SubnetConfiguration(
-                    name="OdinPublicSubnet",
-                    subnet_type=ec2.SubnetType.PUBLIC,
-                    cidr_mask=24,
-                ),
-                ec2.SubnetConfiguration(
-                    name="OdinPrivateNATSubnet",
-                    subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS,
-                    cidr_mask=24,
-                ),
-                ec2.SubnetConfiguration(
-                    name="OdinPrivateSubnet",
-                    subnet_type=ec2.SubnetType.PRIVATE_ISOLATED,
-                    cidr_mask=24,
-                ),
-            ],
-        )
+    Changes often, the network and data stacks are only referenced.
+    """
 
-        ec2.CfnEIPAssociation(
-            self,
-            "OdinNATEIPAssociation",
-            allocation_id=ODIN_API_EIP,
-            instance_id=nat_gateway_provider.configured_gateways[0].gateway_id,
-        )
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        network: OdinNetworkStack,
+        data: OdinDataStack,
+        sizing: SizingProfile | None = None,
+        architecture: ec2.InstanceArchitecture | None = None,
+        api_scaling: ServiceScaling = ServiceScaling(),
+        api_delivery: ApiDelivery | None = None,
+        api_rollout: RolloutProfile = RolloutProfile(),
+        api_pgbouncer: PgBouncerSettings | None = None,
+        api_logging: LogSettings = LogSettings(),
+        api_service_connect: ServiceConnectSettings | None = None,
+        worker: WorkerSettings | None = None,
+        maintenance: MaintenanceSettings | None = None,
+        result_store: ResultStoreSettings | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, id, **kwargs)
 
-        public_zone: aws_route53.IHostedZone = aws_route53.HostedZone.from_lookup(
-            self, "OdinPublicZone", domain_name="odin-smr.org"
-        )
+        if sizing is None:
+            sizing = sizing_from_context(self.node)
+        if architecture is None:
+            architecture = architecture_from_context(self.node)
+        vpc = network.vpc
+        mongo = data.mongo
+        self.delivery = api_delivery
+        self.result_store = result_store
 
-        private_zone: aws_route53.IHostedZone = aws_route53.PrivateHostedZone(
+        self.cluster = cluster = ecs.Cluster(
             self,
-            "OdinPrivateZone",
+            "OdinCluster",
             vpc=vpc,
-            zone_name="odin",
-        )
-
-        mongo: ec2.IInstance = MongoInstance(self, "OdinMongo", vpc, zone=private_zone)
-        admin: ec2.IInstance = AdminInstance(
-            self, "OdinAdmin", vpc, public_zone=public_zone, private_zone=private_zone
+            cluster_name="OdinApiCluster",
+            container_insights_v2=ecs.ContainerInsights.ENABLED,
         )
-        cluster: ecs.ICluster = ecs.Cluster(
-            self, "OdinCluster", vpc=vpc, cluster_name="OdinApiCluster"
-        )
-        service = OdinService(
+        if api_service_connect is not None:
+            cluster.add_default_cloud_map_namespace(
+                name=api_service_connect.namespace,
+                type=servicediscovery.NamespaceType.HTTP,
+                use_for_service_connect=True,
+            )
+        self.service = service = OdinService(
             self,
             "OdinAPIFargateService",
             mongo,
             cluster,
+            cache=data.cache,
+            cpu=sizing.api_cpu,
+            memory_limit_mib=sizing.api_memory_limit_mib,
+            min_capacity=sizing.api_min_capacity,
+            max_capacity=sizing.api_max_capacity,
+            scaling=api_scaling,
+            delivery=api_delivery,
+            domain_zone=lookup_public_zone(self),
+            rollout=api_rollout,
+            architecture=architecture,
+            pgbouncer=api_pgbouncer,
+            data_cache=data.data_cache,
+            log_settings=api_logging,
+            service_connect=api_service_connect,
         )
+        results_bucket: s3.IBucket | None = None
+        if result_store is not None:
+            # Created by the edge stack, which depends on this one. The network
+            # stack's S3 endpoint lets the reads and writes through.
+            results_bucket = s3.Bucket.from_bucket_name(
+                self, "OdinResultsBucket", ODIN_RESULTS_BUCKET
+            )
+            results_bucket.grant_read(service.task_definition.task_role)
+            results_bucket.grant_put(service.task_definition.task_role)
+            service.api_container.add_environment(
+                "ODINAPI_RESULTS_BUCKET", ODIN_RESULTS_BUCKET
+            )
 
-        OdinUICloudfront(
+        OdinDashboard(
             self,
-            "OdinUICloudFront",
-            alb_name=service.load_balancer,
-            zone=public_zone,
+            "OdinDashboard",
+            service=service,
+            mongo=mongo,
+            nat_instance_id=network.nat_instance_id,
+            max_capacity=sizing.api_max_capacity,
         )
+
+        if maintenance is not None:
+            add_maintenance_tasks(self, cluster, mongo, service, maintenance)
+
+        if worker is not None:
+            cluster.enable_fargate_capacity_providers()
+            worker_service = OdinWorkerService(
+                self,
+                "OdinWorkerService",
+                cluster,
+                settings=worker,
+                environment={
+                    "ODIN_API_ROOT": service.internal_api_root or service.api_root,
+                    **(
+                        {"ODINAPI_RESULTS_BUCKET": ODIN_RESULTS_BUCKET}
+                        if result_store is not None
+                        else {}
+                    ),
+                },
+                service_connect=api_service_connect is not None,
+            )
+            if results_bucket is not None:
+                # Batch export of precomputed responses.
+                results_bucket.grant_read(worker_service.task_definition.task_role)
+                results_bucket.grant_put(worker_service.task_definition.task_role)
+            if api_service_connect is not None:
+                service.service.connections.allow_from(
+                    worker_service, ec2.Port.tcp(api_service_connect.port)
+                )
@@ -1,17 +1,193 @@
+from dataclasses import dataclass, field
+
 from aws_cdk import (
     Duration,
     RemovalPolicy,
     Stack,
+    aws_applicationautoscaling,
+    aws_certificatemanager,
+    aws_cloudwatch,
     aws_ec2,
     aws_ecs,
     aws_ecs_patterns,
     aws_ecr,
     aws_elasticloadbalancingv2,
     aws_logs,
+    aws_route53,
     aws_ssm,
 )
 
+from .architecture import runtime_platform
+from .cache import CACHE_PORT, OdinCache
+from .config import ODIN_API_DOMAIN_NAME, ODIN_DATA_BUCKETS
+from .data_cache import OdinDataCache
 from .grant_buckets import grant_read_buckets
+from .log_routing import LogSettings, add_log_router, api_log_driver
+from .mongo import MongoInstance
+
+
+@dataclass(frozen=True)
+class LatencyScaling:
+    """Step scaling on a percentile of the ALB TargetResponseTime (seconds).
+
+    CPU stays low while requests wait on Mongo, so this is what scales the
+    service out when users actually see slow responses. It only ever scales
+    out; scale-in is left to the target tracking policies so the two do not
+    fight over the desired count.
+    """
+
+    statistic: str = "p99"
+    scale_out_above: float = 3.0
+    scale_out_fast_above: float = 10.0
+    fast_step: int = 3
+
+
+@dataclass(frozen=True)
+class MetricScaling:
+    """Target tracking on a custom application metric."""
+
+    id: str
+    namespace: str
+    metric_name: str
+    target_value: float
+    dimensions: dict[str, str] = field(default_factory=dict)
+    statistic: str = "Average"
+
+
+@dataclass(frozen=True)
+class ScheduledCapacity:
+    """Capacity floor (and optionally ceiling) applied from `schedule`.
+
+    Raising the floor for a reprocessing campaign needs one entry at the start
+    and one at the end that restores the normal minimum.
+    """
+
+    id: str
+    schedule: aws_applicationautoscaling.Schedule
+    min_capacity: int
+    max_capacity: int | None = None
+
+
+@dataclass(frozen=True)
+class ServiceScaling:
+    cpu_target_percent: int = 50
+    requests_per_target: int = 400
+    latency: LatencyScaling | None = LatencyScaling()
+    metrics: tuple[MetricScaling, ...] = ()
+    schedules: tuple[ScheduledCapacity, ...] = ()
+
+
+@dataclass(frozen=True)
+class PgBouncerSettings:
+    """PgBouncer sidecar that pools the Postgres connections of one task.
+
+    The API connects to PgBouncer on localhost, so a scale-out only opens
+    `pool_size` server connections per task instead of one per worker.
+    Transaction pooling does not keep session state (SET, advisory locks)
+    between transactions, use "session" if the API starts to rely on it.
+    The API container waits for the sidecar's health check, so `image` must
+    provide pg_isready.
+    """
+
+    image: str = "edoburu/pgbouncer:v1.23.1-p2"
+    pool_mode: str = "transaction"
+    pool_size: int = 20
+    max_client_connections: int = 200
+    auth_type: str = "scram-sha-256"
+
+    def __post_init__(self) -> None:
+        if self.pool_mode not in ("session", "transaction", "statement"):
+            raise ValueError(f"Unknown pool_mode {self.pool_mode!r}")
+        if not 0 < self.pool_size <= self.max_client_connections:
+            raise ValueError("Need 0 < pool_size <= max_client_connections")
+
+
+@dataclass(frozen=True)
+class RolloutProfile:
+    """Health checks, draining and deployment behaviour of the API service.
+
+    With the defaults a task that stops answering leaves the target group
+    after about 20 s, requests go to the task with the fewest in flight and
+    a deployment that cannot get healthy tasks is rolled back by the circuit
+    breaker instead of retrying for hours.
+
+    `slow_start` ramps traffic to new tasks up gradually. The target group
+    only supports it with round robin, so it is off by default and needs
+    `least_outstanding_requests=False`.
+    """
+
+    health_check_interval: Duration = Duration.seconds(10)
+    health_check_timeout: Duration = Duration.seconds(5)
+    healthy_threshold: int = 2
+    unhealthy_threshold: int = 2
+    deregistration_delay: Duration = Duration.seconds(30)
+    least_outstanding_requests: bool = True
+    slow_start: Duration | None = None
+    container_health_check_interval: Duration = Duration.seconds(15)
+    container_health_check_timeout: Duration = Duration.seconds(5)
+    container_health_check_retries: int = 3
+    container_start_period: Duration = Duration.seconds(60)
+    health_check_grace_period: Duration = Duration.seconds(60)
+    min_healthy_percent: int = 100
+    max_healthy_percent: int = 200
+    circuit_breaker_rollback: bool = True
+
+    def __post_init__(self) -> None:
+        if self.health_check_timeout.to_seconds() >= (
+            self.health_check_interval.to_seconds()
+        ):
+            raise ValueError("health_check_timeout must be below the interval")
+        for name in ("healthy_threshold", "unhealthy_threshold"):
+            if not 2 <= getattr(self, name) <= 10:
+                raise ValueError(f"{name} must be between 2 and 10")
+        if self.slow_start is not None and not (
+            30 <= self.slow_start.to_seconds() <= 900
+        ):
+            raise ValueError("slow_start must be between 30 s and 15 min")
+        if self.slow_start is not None and self.least_outstanding_requests:
+            raise ValueError("slow_start needs least_outstanding_requests=False")
+        if not 1 <= self.container_health_check_retries <= 10:
+            raise ValueError("container_health_check_retries must be 1 to 10")
+
+
+@dataclass(frozen=True)
+class ApiDelivery:
+    """HTTPS listener on `domain_name` with HTTP/2 (or gRPC) to the tasks.
+
+    CloudFront connects to `domain_name` over TLS and reuses origin
+    connections for `origin_keepalive_timeout`, which must stay below the ALB
+    idle timeout. Without `certificate_arn` a DNS validated certificate is
+    issued in the stack region.
+    """
+
+    domain_name: str = ODIN_API_DOMAIN_NAME
+    certificate_arn: str | None = None
+    target_protocol_version: aws_elasticloadbalancingv2.ApplicationProtocolVersion = (
+        aws_elasticloadbalancingv2.ApplicationProtocolVersion.HTTP2
+    )
+    origin_keepalive_timeout: Duration = Duration.seconds(60)
+    origin_read_timeout: Duration = Duration.seconds(60)
+
+
+@dataclass(frozen=True)
+class ServiceConnectSettings:
+    """Publish the API in the Service Connect namespace of the cluster.
+
+    Services in the cluster that enable Service Connect reach the API at
+    `http://{dns_name}:{port}` through their Envoy proxy, which retries
+    failed requests, ejects failing tasks and reports per-service latency
+    and errors in the AWS/ECS namespace, without the public ALB hop.
+    """
+
+    namespace: str = "odin.internal"
+    dns_name: str = "odin-api"
+    port: int = 8000
+    idle_timeout: Duration = Duration.minutes(6)
+    per_request_timeout: Duration = Duration.minutes(5)
+
+    def __post_init__(self) -> None:
+        if self.per_request_timeout.to_seconds() > self.idle_timeout.to_seconds():
+            raise ValueError("per_request_timeout must not exceed idle_timeout")
 
 
 class OdinService(aws_ecs_patterns.ApplicationLoadBalancedFargateService):
@@ -19,9 +195,28 @@ class OdinService(aws_ecs_patterns.ApplicationLoadBalancedFargateService):
         self,
         scope: Stack,
         id: str,
-        mongo: aws_ec2.IInstance,
+        mongo: MongoInstance,
         cluster: aws_ecs.ICluster,
+        cache: OdinCache | None = None,
+        cpu: int = 2048,
+        memory_limit_mib: int = 4096,
+        min_capacity: int = 1,
+        max_capacity: int = 10,
+        scaling: ServiceScaling = ServiceScaling(),
+        delivery: ApiDelivery | None = None,
+        domain_zone: aws_route53.IHostedZone | None = None,
+        rollout: RolloutProfile = RolloutProfile(),
+        architecture: aws_ec2.InstanceArchitecture = aws_ec2.InstanceArchitecture.X86_64,
+        pgbouncer: PgBouncerSettings | None = None,
+        data_cache: OdinDataCache | None = None,
+        log_settings: LogSettings = LogSettings(),
+        service_connect: ServiceConnectSettings | None = None,
     ):
+        if not 0 < min_capacity <= max_capacity:
+            raise ValueError("Need 0 < min_capacity <= max_capacity")
+        if delivery is not None and domain_zone is None:
+            raise ValueError("An HTTPS delivery needs the domain_zone")
+
         log_group = aws_logs.LogGroup(
             scope,
             "OdinClusterLogGroup",
@@ -30,28 +225,14 @@ class OdinService(aws_ecs_patterns.ApplicationLoadBalancedFargateService):
             retention=aws_logs.RetentionDays.SIX_MONTHS,
         )
 
-        logging = aws_ecs.AwsLogDriver(stream_prefix="OdinAPI", log_group=log_group)
-
         odinapi_task: aws_ecs.FargateTaskDefinition = aws_ecs.FargateTaskDefinition(
             scope,
             "OdinAPITaskDefinition",
-            cpu=2048,
-            memory_limit_mib=4096,
-        )
-        grant_read_buckets(
-            scope,
-            odinapi_task.task_role,
-            [
-                "odin-apriori",
-                "odin-era5",
-                "odin-osiris",
-                "odin-psql",
-                "odin-smr",
-                "odin-solar",
-                "odin-vds-data",
-                "odin-zpt",
-            ],
+            cpu=cpu,
+            memory_limit_mib=memory_limit_mib,
+            runtime_platform=runtime_platform(architecture),
         )
+        grant_read_buckets(scope, odinapi_task.task_role, ODIN_DATA_BUCKETS)
 
         odin_secret_key = aws_ssm.StringParameter.from_string_parameter_name(
             scope, "OdinSecretKey", "/odin-api/secret-key"
@@ -74,10 +255,36 @@ class OdinService(aws_ecs_patterns.ApplicationLoadBalancedFargateService):
         odin_pgpass = aws_ssm.StringParameter.from_string_parameter_name(
             scope, "OdinPGPASS", "/odin/psql/password"
         ).string_value
+        environment = {
+            "SECRET_KEY": odin_secret_key,
+            "ODIN_API_PRODUCTION": "1",
+            "ODINAPI_MONGODB_USERNAME": odin_mongo_user,
+            "ODINAPI_MONGODB_PASSWORD": odin_mongo_password,
+            "ODINAPI_MONGODB_HOST": mongo.connection_string,
+            "PGHOST": odin_pghost if pgbouncer is None else "127.0.0.1",
+            "PGDBNAME": odin_pgdbname,
+            "PGUSER": odin_pguser,
+            "PGPASS": odin_pgpass,
+        }
+        if cache is not None:
+            environment.update(
+                {
+                    "ODINAPI_CACHE_HOST": cache.endpoint_address,
+                    "ODINAPI_CACHE_PORT": str(CACHE_PORT),
+                    "ODINAPI_CACHE_TLS": (
+                        "1" if cache.settings.transit_encryption else "0"
+                    ),
+                    "ODINAPI_CACHE_CLUSTER": (
+                        "1" if cache.settings.cluster_mode else "0"
+                    ),
+                }
+            )
+        if data_cache is not None:
+            environment["ODINAPI_DATA_CACHE"] = data_cache.settings.mount_path
         ecr_repository = aws_ecr.Repository.from_repository_name(
             scope, "OdinAPIRepo", "odin-api"
         )
-        odinapi_task.add_container(
+        api_container = odinapi_task.add_container(
             "OdinAPIContainer",
             image=aws_ecs.ContainerImage.from_ecr_repository(ecr_repository),
             port_mappings=[
@@ -87,28 +294,76 @@ class OdinService(aws_ecs_patterns.ApplicationLoadBalancedFargateService):
                     name="odinapi",
                 ),
             ],
-            environment={
-                "SECRET_KEY": odin_secret_key,
-                "ODIN_API_PRODUCTION": "1",
-                "ODINAPI_MONGODB_USERNAME": odin_mongo_user,
-                "ODINAPI_MONGODB_PASSWORD": odin_mongo_password,
-                "ODINAPI_MONGODB_HOST": mongo.instance_private_ip,
-                "PGHOST": odin_pghost,
-                "PGDBNAME": odin_pgdbname,
-                "PGUSER": odin_pguser,
-                "PGPASS": odin_pgpass,
-            },
+            environment=environment,
             health_check=aws_ecs.HealthCheck(
                 command=[
                     "CMD-SHELL",
                     "curl -f http://localhost:8000/rest_api/health_check || exit 1",
                 ],
-                interval=Duration.seconds(120),
-                timeout=Duration.seconds(20),
-                retries=5,
+                interval=rollout.container_health_check_interval,
+                timeout=rollout.container_health_check_timeout,
+                retries=rollout.container_health_check_retries,
+                start_period=rollout.container_start_period,
             ),
-            logging=logging,
+            logging=api_log_driver(log_settings, log_group),
         )
+        log_router_config = add_log_router(scope, odinapi_task, log_group, log_settings)
+        if data_cache is not None:
+            data_cache.add_to_task(odinapi_task)
+            api_container.add_mount_points(
+                aws_ecs.MountPoint(
+                    source_volume="odin-data",
+                    container_path=data_cache.settings.mount_path,
+                    read_only=True,
+                )
+            )
+        if pgbouncer is not None:
+            pgbouncer_container = odinapi_task.add_container(
+                "OdinPgBouncerContainer",
+                image=aws_ecs.ContainerImage.from_registry(pgbouncer.image),
+                environment={
+                    "DB_HOST": odin_pghost,
+                    "DB_NAME": odin_pgdbname,
+                    "DB_USER": odin_pguser,
+                    "DB_PASSWORD": odin_pgpass,
+                    "AUTH_TYPE": pgbouncer.auth_type,
+                    "POOL_MODE": pgbouncer.pool_mode,
+                    "DEFAULT_POOL_SIZE": str(pgbouncer.pool_size),
+                    "MAX_CLIENT_CONN": str(pgbouncer.max_client_connections),
+                    "LISTEN_PORT": "5432",
+                },
+                memory_reservation_mib=64,
+                logging=log_settings.aws_log_driver("PgBouncer", log_group),
+                # The API only starts once PgBouncer accepts connections.
+                health_check=aws_ecs.HealthCheck(
+                    command=["CMD-SHELL", "pg_isready -h 127.0.0.1 -p 5432 -t 2"],
+                    interval=rollout.container_health_check_interval,
+                    timeout=rollout.container_health_check_timeout,
+                    retries=rollout.container_health_check_retries,
+                    start_period=Duration.seconds(10),
+                ),
+            )
+            api_container.add_container_dependencies(
+                aws_ecs.ContainerDependency(
+                    container=pgbouncer_container,
+                    condition=aws_ecs.ContainerDependencyCondition.HEALTHY,
+                )
+            )
+
+        certificate: aws_certificatemanager.ICertificate | None = None
+        if delivery is not None and delivery.certificate_arn is not None:
+            certificate = aws_certificatemanager.Certificate.from_certificate_arn(
+                scope, "OdinApiCertificate", delivery.certificate_arn
+            )
+        elif delivery is not None and domain_zone is not None:
+            certificate = aws_certificatemanager.Certificate(
+                scope,
+                "OdinApiCertificate",
+                domain_name=delivery.domain_name,
+                validation=aws_certificatemanager.CertificateValidation.from_dns(
+                    domain_zone
+                ),
+            )
 
         super().__init__(
             scope,
@@ -116,40 +371,164 @@ class OdinService(aws_ecs_patterns.ApplicationLoadBalancedFargateService):
             task_subnets=aws_ec2.SubnetSelection(
                 subnet_type=aws_ec2.SubnetType.PRIVATE_WITH_EGRESS
             ),
-            cpu=2048,
+            cpu=cpu,
             service_name="OdinFargateService",
             cluster=cluster,
-            desired_count=1,
+            desired_count=min_capacity,
             task_definition=odinapi_task,
-            memory_limit_mib=4096,
+            memory_limit_mib=memory_limit_mib,
             public_load_balancer=True,
-            protocol=aws_elasticloadbalancingv2.ApplicationProtocol.HTTP,
+            health_check_grace_period=rollout.health_check_grace_period,
+            min_healthy_percent=rollout.min_healthy_percent,
+            max_healthy_percent=rollout.max_healthy_percent,
+            circuit_breaker=aws_ecs.DeploymentCircuitBreaker(
+                rollback=rollout.circuit_breaker_rollback
+            ),
             idle_timeout=Duration.seconds(360),
             redirect_http=False,
+            protocol=(
+                aws_elasticloadbalancingv2.ApplicationProtocol.HTTP
+                if delivery is None
+                else aws_elasticloadbalancingv2.ApplicationProtocol.HTTPS
+            ),
+            certificate=certificate,
+            ssl_policy=(
+                None
+                if delivery is None
+                else aws_elasticloadbalancingv2.SslPolicy.RECOMMENDED_TLS
+            ),
+            domain_name=None if delivery is None else delivery.domain_name,
+            domain_zone=None if delivery is None else domain_zone,
+            target_protocol=aws_elasticloadbalancingv2.ApplicationProtocol.HTTP,
+            protocol_version=(
+                None if delivery is None else delivery.target_protocol_version
+            ),
         )
 
-        scaling = self.service.auto_scale_task_count(max_capacity=10, min_capacity=1)
+        self.api_container = api_container
+        self.log_router_config = log_router_config
+        self.api_root = (
+            f"https://{delivery.domain_name}"
+            if delivery is not None
+            else "http://" + self.load_balancer.load_balancer_dns_name
+        )
+        self.internal_api_root: str | None = None
+        if service_connect is not None:
+            # In the default namespace of the cluster, see OdinAPIStack.
+            self.service.enable_service_connect(
+                services=[
+                    aws_ecs.ServiceConnectService(
+                        port_mapping_name="odinapi",
+                        dns_name=service_connect.dns_name,
+                        port=service_connect.port,
+                        idle_timeout=service_connect.idle_timeout,
+                        per_request_timeout=service_connect.per_request_timeout,
+                    )
+                ],
+                log_driver=log_settings.aws_log_driver("ServiceConnect", log_group),
+            )
+            self.internal_api_root = (
+                f"http://{service_connect.dns_name}:{service_connect.port}"
+            )
+
+        # From the service side, so the ingress rules live in this stack.
+        if cache is not None:
+            self.service.connections.allow_to_default_port(cache.connections)
+        if data_cache is not None:
+            self.service.connections.allow_to_default_port(data_cache.connections)
+
+        self.configure_scaling(min_capacity, max_capacity, scaling)
+
+        self.configure_rollout(rollout)
+
+    def configure_rollout(self, rollout: RolloutProfile) -> None:
+        self.target_group.configure_health_check(
+            interval=rollout.health_check_interval,
+            timeout=rollout.health_check_timeout,
+            healthy_threshold_count=rollout.healthy_threshold,
+            unhealthy_threshold_count=rollout.unhealthy_threshold,
+            path="/rest_api/health_check",
+        )
+        self.target_group.set_attribute(
+            "deregistration_delay.timeout_seconds",
+            str(int(rollout.deregistration_delay.to_seconds())),
+        )
+        if rollout.least_outstanding_requests:
+            self.target_group.set_attribute(
+                "load_balancing.algorithm.type", "least_outstanding_requests"
+            )
+        if rollout.slow_start is not None:
+            self.target_group.set_attribute(
+                "slow_start.duration_seconds",
+                str(int(rollout.slow_start.to_seconds())),
+            )
+
+    def configure_scaling(
+        self, min_capacity: int, max_capacity: int, settings: ServiceScaling
+    ) -> None:
+        scaling = self.service.auto_scale_task_count(
+            max_capacity=max_capacity, min_capacity=min_capacity
+        )
 
         # Scale the service based on CPU Utilization
         scaling.scale_on_cpu_utilization(
             "CpuScaling",
-            target_utilization_percent=50,
+            target_utilization_percent=settings.cpu_target_percent,
             scale_in_cooldown=Duration.seconds(60),
             scale_out_cooldown=Duration.seconds(60),
         )
 
         scaling.scale_on_request_count(
             "RequestCountScaling",
-            requests_per_target=400,
+            requests_per_target=settings.requests_per_target,
             target_group=self.target_group,
             scale_in_cooldown=Duration.seconds(60),
             scale_out_cooldown=Duration.seconds(60),
         )
 
-        self.target_group.configure_health_check(
-            interval=Duration.seconds(120),
-            timeout=Duration.seconds(20),
-            healthy_threshold_count=2,
-            unhealthy_threshold_count=7,
-            path="/rest_api/health_check",
-        )
+        if settings.latency is not None:
+            latency = settings.latency
+            scaling.scale_on_metric(
+                "LatencyScaling",
+                metric=self.target_group.metrics.target_response_time(
+                    statistic=latency.statistic,
+                    period=Duration.minutes(1),
+                ),
+                scaling_steps=[
+                    aws_applicationautoscaling.ScalingInterval(
+                        upper=latency.scale_out_above, change=0
+                    ),
+                    aws_applicationautoscaling.ScalingInterval(
+                        lower=latency.scale_out_above, change=+1
+                    ),
+                    aws_applicationautoscaling.ScalingInterval(
+                        lower=latency.scale_out_fast_above, change=+latency.fast_step
+                    ),
+                ],
+                adjustment_type=aws_applicationautoscaling.AdjustmentType.CHANGE_IN_CAPACITY,
+                cooldown=Duration.seconds(60),
+                evaluation_periods=3,
+            )
+
+        for metric in settings.metrics:
+            scaling.scale_to_track_custom_metric(
+                metric.id,
+                metric=aws_cloudwatch.Metric(
+                    namespace=metric.namespace,
+                    metric_name=metric.metric_name,
+                    dimensions_map=metric.dimensions,
+                    statistic=metric.statistic,
+                    period=Duration.minutes(1),
+                ),
+                target_value=metric.target_value,
+                scale_in_cooldown=Duration.seconds(60),
+                scale_out_cooldown=Duration.seconds(60),
+            )
+
+        for schedule in settings.schedules:
+            scaling.scale_on_schedule(
+                schedule.id,
+                schedule=schedule.schedule,
+                min_capacity=schedule.min_capacity,
+                max_capacity=schedule.max_capacity,
+            )
@@ -0,0 +1,78 @@
+from aws_cdk import Stack
+from aws_cdk import aws_ec2 as ec2
+from constructs import Construct
+
+from .admin_host import AdminInstance
+from .architecture import architecture_from_context
+from .cache import CacheSettings, OdinCache
+from .data_cache import DataCacheSettings, OdinDataCache
+from .mongo import (
+    MongodConfig,
+    MongoInstance,
+    MongoStorageProfile,
+    ReplicaSetSettings,
+)
+from .odin_network_stack import OdinNetworkStack, lookup_public_zone
+from .sizing import SizingProfile, sizing_from_context
+
+
+class OdinDataStack(Stack):
+    """Mongo, the admin host and the optional Valkey and EFS caches."""
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        network: OdinNetworkStack,
+        cache: CacheSettings | None = None,
+        sizing: SizingProfile | None = None,
+        architecture: ec2.InstanceArchitecture | None = None,
+        mongo_replica_set: ReplicaSetSettings | None = None,
+        mongo_storage: MongoStorageProfile = MongoStorageProfile(),
+        mongo_config: MongodConfig = MongodConfig(),
+        data_cache: DataCacheSettings | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, id, **kwargs)
+
+        if sizing is None:
+            sizing = sizing_from_context(self.node)
+        if architecture is None:
+            architecture = architecture_from_context(self.node)
+
+        self.mongo = MongoInstance(
+            self,
+            "OdinMongo",
+            network.vpc,
+            zone=network.private_zone,
+            replica_set=mongo_replica_set,
+            instance_type=sizing.mongo_instance_type,
+            storage=mongo_storage,
+            architecture=architecture,
+            config=mongo_config,
+        )
+        self.admin: ec2.IInstance = AdminInstance(
+            self,
+            "OdinAdmin",
+            network.vpc,
+            public_zone=lookup_public_zone(self),
+            private_zone=network.private_zone,
+            instance_type=sizing.admin_instance_type,
+            architecture=architecture,
+        )
+        self.cache = (
+            OdinCache(
+                self,
+                "OdinCache",
+                network.vpc,
+                zone=network.private_zone,
+                settings=cache,
+            )
+            if cache is not None
+            else None
+        )
+        self.data_cache = (
+            OdinDataCache(self, "OdinDataCache", network.vpc, settings=data_cache)
+            if data_cache is not None
+            else None
+        )
@@ -0,0 +1,32 @@
+from aws_cdk import Stack
+from constructs import Construct
+
+from odin_infrastructure.odin_ui_cloudfront import OdinUICloudfront
+
+from .odin_api_stack import OdinAPIStack
+from .odin_network_stack import lookup_public_zone
+
+
+class OdinEdgeStack(Stack):
+    """The CloudFront distribution in front of the UI bucket and the API.
+
+    Kept apart since distribution updates take long to propagate.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        api: OdinAPIStack,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, id, **kwargs)
+
+        self.distribution = OdinUICloudfront(
+            self,
+            "OdinUICloudFront",
+            alb_name=api.service.load_balancer,
+            zone=lookup_public_zone(self),
+            delivery=api.delivery,
+            results=api.result_store,
+        )
@@ -0,0 +1,345 @@
+import dataclasses
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from aws_cdk import Duration, RemovalPolicy, Stack
+from aws_cdk import aws_cloudwatch as cloudwatch
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_ecr_assets as ecr_assets
+from aws_cdk import aws_ecs as ecs
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_logs as logs
+from aws_cdk import aws_s3 as s3
+from aws_cdk import aws_servicediscovery as servicediscovery
+from constructs import Construct, Node
+
+from .config import ODIN_DOMAIN_NAME, ODIN_LOAD_TEST_BUCKET
+from .log_routing import LogSettings
+from .odin_api_stack import OdinAPIStack
+from .odin_data_stack import OdinDataStack
+from .odin_network_stack import OdinNetworkStack
+
+CONTEXT_KEY = "odin:load-test"
+LOAD_TESTS = Path(__file__).parent / "load-tests"
+METRICS_NAMESPACE = "Odin/LoadTest"
+TARGETS = ("alb", "cloudfront")
+MASTER_SERVICE = "OdinLoadTestMaster"
+WORKER_SERVICE = "OdinLoadTestWorkers"
+MASTER_PORTS = ec2.Port.tcp_range(5557, 5558)
+PERIOD = Duration.minutes(1)
+# (metric name, field of the locustStats lines, unit)
+LOCUST_METRICS = (
+    ("Users", "users", cloudwatch.Unit.COUNT),
+    ("RequestsPerSecond", "rps", cloudwatch.Unit.COUNT_PER_SECOND),
+    ("FailuresPerSecond", "failRps", cloudwatch.Unit.COUNT_PER_SECOND),
+    ("ResponseTimeP50", "p50", cloudwatch.Unit.MILLISECONDS),
+    ("ResponseTimeP95", "p95", cloudwatch.Unit.MILLISECONDS),
+    ("ResponseTimeP99", "p99", cloudwatch.Unit.MILLISECONDS),
+)
+
+
+@dataclass(frozen=True)
+class LoadTestSettings:
+    """A headless distributed Locust run against the API.
+
+    `scenario` is a locustfile in odin_infrastructure/load-tests/scenarios.
+    The `alb` target measures the API service, Mongo and the NAT instance
+    (the workers reach the public ALB through it), `cloudfront` adds the
+    edge caches.
+    """
+
+    scenario: str = "odin_api"
+    target: str = "alb"
+    workers: int = 4
+    users: int = 400
+    spawn_rate: int = 10
+    run_time: str = "15m"
+    worker_cpu: int = 1024
+    worker_memory_limit_mib: int = 2048
+
+    def __post_init__(self) -> None:
+        if self.target not in TARGETS:
+            raise ValueError(f"target must be one of {TARGETS}")
+        if not (LOAD_TESTS / "scenarios" / f"{self.scenario}.py").exists():
+            raise ValueError(f"No scenario {self.scenario} in {LOAD_TESTS}")
+        if self.workers < 1 or self.users < self.workers:
+            raise ValueError("Need 1 <= workers <= users")
+
+
+def load_test_from_context(node: Node) -> LoadTestSettings | None:
+    """Settings of `-c 'odin:load-test={"target": "cloudfront"}'`, if given.
+
+    `-c odin:load-test={}` deploys the stack with the default settings.
+    """
+    values = node.try_get_context(CONTEXT_KEY)
+    if values is None:
+        return None
+    if isinstance(values, str):
+        values = json.loads(values)
+    unknown = set(values) - {
+        field.name for field in dataclasses.fields(LoadTestSettings)
+    }
+    if unknown:
+        raise ValueError(f"Unknown load test settings {sorted(unknown)}")
+    return LoadTestSettings(**values)
+
+
+class OdinLoadTestStack(Stack):
+    """Locust master and workers as Fargate services in OdinApiCluster.
+
+    Both services are deployed with no tasks. Scaling them up starts a run,
+    the master uploads the reports to the results bucket when it is done
+    and scales both back to zero.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        network: OdinNetworkStack,
+        data: OdinDataStack,
+        api: OdinAPIStack,
+        settings: LoadTestSettings = LoadTestSettings(),
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, id, **kwargs)
+
+        self.results = s3.Bucket(
+            self,
+            "OdinLoadTestResults",
+            bucket_name=ODIN_LOAD_TEST_BUCKET,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            lifecycle_rules=[s3.LifecycleRule(expiration=Duration.days(365))],
+        )
+        log_group = logs.LogGroup(
+            self,
+            "OdinLoadTestLogGroup",
+            log_group_name="/Odin/LoadTest",
+            removal_policy=RemovalPolicy.DESTROY,
+            retention=logs.RetentionDays.THREE_MONTHS,
+        )
+        image = ecs.ContainerImage.from_asset(
+            str(LOAD_TESTS), platform=ecr_assets.Platform.LINUX_AMD64
+        )
+        namespace = servicediscovery.PrivateDnsNamespace(
+            self, "OdinLoadTestNamespace", name="loadtest.odin", vpc=network.vpc
+        )
+        host = (
+            api.service.api_root
+            if settings.target == "alb"
+            else f"https://{ODIN_DOMAIN_NAME}"
+        )
+        locustfile = f"scenarios/{settings.scenario}.py"
+
+        master_task = ecs.FargateTaskDefinition(
+            self, "OdinLoadTestMasterTaskDefinition", cpu=1024, memory_limit_mib=2048
+        )
+        master_task.add_container(
+            "OdinLoadTestMasterContainer",
+            image=image,
+            command=[
+                "-f",
+                locustfile,
+                "--master",
+                "--headless",
+                "--host",
+                host,
+                "--expect-workers",
+                str(settings.workers),
+                "--users",
+                str(settings.users),
+                "--spawn-rate",
+                str(settings.spawn_rate),
+                "--run-time",
+                settings.run_time,
+                "--csv",
+                "/tmp/odin",
+                "--html",
+                "/tmp/odin.html",
+            ],
+            environment={
+                "ODIN_SCENARIO": settings.scenario,
+                "ODIN_RESULTS_BUCKET": self.results.bucket_name,
+                "ODIN_CLUSTER": api.cluster.cluster_name,
+                "ODIN_LOAD_TEST_SERVICES": f"{WORKER_SERVICE},{MASTER_SERVICE}",
+            },
+            port_mappings=[ecs.PortMapping(container_port=5557)],
+            logging=LogSettings().aws_log_driver("Master", log_group),
+        )
+        # The network stack's S3 endpoint lets the upload through.
+        self.results.grant_put(master_task.task_role)
+        master_task.add_to_task_role_policy(
+            iam.PolicyStatement(
+                actions=["ecs:UpdateService"],
+                resources=[
+                    self.format_arn(
+                        service="ecs",
+                        resource="service",
+                        resource_name=f"{api.cluster.cluster_name}/OdinLoadTest*",
+                    )
+                ],
+            )
+        )
+        master = ecs.FargateService(
+            self,
+            "OdinLoadTestMasterService",
+            cluster=api.cluster,
+            service_name=MASTER_SERVICE,
+            task_definition=master_task,
+            desired_count=0,
+            vpc_subnets=ec2.SubnetSelection(
+                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+            ),
+            cloud_map_options=ecs.CloudMapOptions(
+                name="master",
+                cloud_map_namespace=namespace,
+                dns_ttl=Duration.seconds(10),
+            ),
+        )
+
+        worker_task = ecs.FargateTaskDefinition(
+            self,
+            "OdinLoadTestWorkerTaskDefinition",
+            cpu=settings.worker_cpu,
+            memory_limit_mib=settings.worker_memory_limit_mib,
+        )
+        worker_task.add_container(
+            "OdinLoadTestWorkerContainer",
+            image=image,
+            command=[
+                "-f",
+                locustfile,
+                "--worker",
+                "--master-host",
+                "master.loadtest.odin",
+                # One process per vCPU.
+                "--processes",
+                str(max(1, settings.worker_cpu // 1024)),
+            ],
+            environment={"ODIN_SCENARIO": settings.scenario},
+            logging=LogSettings().aws_log_driver("Worker", log_group),
+        )
+        workers = ecs.FargateService(
+            self,
+            "OdinLoadTestWorkerService",
+            cluster=api.cluster,
+            service_name=WORKER_SERVICE,
+            task_definition=worker_task,
+            desired_count=0,
+            vpc_subnets=ec2.SubnetSelection(
+                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+            ),
+        )
+        master.connections.allow_from(workers, MASTER_PORTS)
+
+        for metric_name, field, _ in LOCUST_METRICS:
+            logs.MetricFilter(
+                self,
+                f"OdinLoadTest{metric_name}Filter",
+                log_group=log_group,
+                filter_pattern=logs.FilterPattern.string_value(
+                    "$.event", "=", "locustStats"
+                ),
+                metric_namespace=METRICS_NAMESPACE,
+                metric_name=metric_name,
+                metric_value=f"$.{field}",
+                dimensions={"Scenario": "$.scenario"},
+            )
+
+        self.dashboard = self._add_dashboard(network, data, api, settings)
+
+    def _add_dashboard(
+        self,
+        network: OdinNetworkStack,
+        data: OdinDataStack,
+        api: OdinAPIStack,
+        settings: LoadTestSettings,
+    ) -> cloudwatch.Dashboard:
+        def locust_metric(name: str) -> cloudwatch.Metric:
+            return cloudwatch.Metric(
+                namespace=METRICS_NAMESPACE,
+                metric_name=name,
+                dimensions_map={"Scenario": settings.scenario},
+                statistic="Average",
+                period=PERIOD,
+            )
+
+        def ec2_metric(instance_id: str, name: str, label: str) -> cloudwatch.Metric:
+            return cloudwatch.Metric(
+                namespace="AWS/EC2",
+                metric_name=name,
+                dimensions_map={"InstanceId": instance_id},
+                statistic="Average",
+                period=PERIOD,
+                label=label,
+            )
+
+        target_metrics = api.service.target_group.metrics
+        dashboard = cloudwatch.Dashboard(
+            self,
+            "OdinLoadTestDashboard",
+            dashboard_name="OdinLoadTest",
+            default_interval=Duration.hours(1),
+        )
+        dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title="Locust throughput",
+                left=[locust_metric("RequestsPerSecond")],
+                right=[locust_metric("FailuresPerSecond"), locust_metric("Users")],
+                width=12,
+            ),
+            cloudwatch.GraphWidget(
+                title="Locust response time (ms)",
+                left=[
+                    locust_metric("ResponseTimeP50"),
+                    locust_metric("ResponseTimeP95"),
+                    locust_metric("ResponseTimeP99"),
+                ],
+                width=12,
+            ),
+        )
+        dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title="ALB target response time (s)",
+                left=[
+                    target_metrics.target_response_time(
+                        statistic=statistic, period=PERIOD
+                    )
+                    for statistic in ("p50", "p99")
+                ],
+                right=[target_metrics.request_count(period=PERIOD, statistic="Sum")],
+                width=8,
+            ),
+            cloudwatch.GraphWidget(
+                title="API tasks",
+                left=[
+                    cloudwatch.Metric(
+                        namespace="ECS/ContainerInsights",
+                        metric_name="RunningTaskCount",
+                        dimensions_map={
+                            "ClusterName": api.cluster.cluster_name,
+                            "ServiceName": api.service.service.service_name,
+                        },
+                        statistic="Maximum",
+                        period=PERIOD,
+                    )
+                ],
+                right=[api.service.service.metric_cpu_utilization(period=PERIOD)],
+                width=8,
+            ),
+            cloudwatch.GraphWidget(
+                title="Mongo and NAT CPU (%)",
+                left=[
+                    ec2_metric(member.instance_id, "CPUUtilization", f"Mongo {index}")
+                    for index, member in enumerate(data.mongo.members)
+                ]
+                + [ec2_metric(network.nat_instance_id, "CPUUtilization", "NAT")],
+                right=[
+                    ec2_metric(network.nat_instance_id, "NetworkOut", "NAT out"),
+                ],
+                width=8,
+            ),
+        )
+        return dashboard
@@ -0,0 +1,95 @@
+from aws_cdk import Stack
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_route53
+from constructs import Construct
+
+from .config import (
+    ODIN_API_EIP,
+    ODIN_DATA_BUCKETS,
+    ODIN_LOAD_TEST_BUCKET,
+    ODIN_RESULTS_BUCKET,
+)
+from .sizing import SizingProfile, sizing_from_context
+from .vpc_endpoints import add_vpc_endpoints
+
+
+def lookup_public_zone(scope: Construct) -> aws_route53.IHostedZone:
+    """The odin-smr.org zone, looked up (and cached) per stack."""
+    return aws_route53.HostedZone.from_lookup(
+        scope, "OdinPublicZone", domain_name="odin-smr.org"
+    )
+
+
+class OdinNetworkStack(Stack):
+    """VPC, NAT instance, VPC endpoints and the private `odin` zone.
+
+    Slow changing, everything else in the app depends on it.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        sizing: SizingProfile | None = None,
+        interface_endpoints: bool = False,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, id, **kwargs)
+
+        if sizing is None:
+            sizing = sizing_from_context(self.node)
+
+        nat_gateway_provider = ec2.NatProvider.instance(
+            instance_type=ec2.InstanceType(sizing.nat_instance_type)
+        )
+        self.vpc: ec2.IVpc = ec2.Vpc(
+            self,
+            "OdinVPC",
+            nat_gateway_provider=nat_gateway_provider,
+            max_azs=2,
+            nat_gateways=1,
+            vpc_name="OdinVPC",
+            subnet_configuration=[
+                ec2.SubnetConfiguration(
+                    name="OdinPublicSubnet",
+                    subnet_type=ec2.SubnetType.PUBLIC,
+                    cidr_mask=24,
+                ),
+                ec2.SubnetConfiguration(
+                    name="OdinPrivateNATSubnet",
+                    subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS,
+                    cidr_mask=24,
+                ),
+                ec2.SubnetConfiguration(
+                    name="OdinPrivateSubnet",
+                    subnet_type=ec2.SubnetType.PRIVATE_ISOLATED,
+                    cidr_mask=24,
+                ),
+            ],
+        )
+        self.nat_instance_id = nat_gateway_provider.configured_gateways[0].gateway_id
+
+        ec2.CfnEIPAssociation(
+            self,
+            "OdinNATEIPAssociation",
+            allocation_id=ODIN_API_EIP,
+            instance_id=self.nat_instance_id,
+        )
+
+        # Buckets written from the private subnets are opened here, whether
+        # or not the stack writing them is deployed, so that deploying this
+        # stack on its own never revokes them.
+        self.s3_endpoint = add_vpc_endpoints(
+            self,
+            self.vpc,
+            ODIN_DATA_BUCKETS,
+            upload_bucket_names=[ODIN_RESULTS_BUCKET, ODIN_LOAD_TEST_BUCKET],
+            interface_endpoints=interface_endpoints,
+        )
+
+        self.private_zone: aws_route53.IHostedZone = aws_route53.PrivateHostedZone(
+            self,
+            "OdinPrivateZone",
+            vpc=self.vpc,
+            zone_name="odin",
+        )
@@ -1,3 +1,6 @@
+from dataclasses import dataclass
+
+from aws_cdk import Duration
 from aws_cdk import aws_certificatemanager as certificatemanager
 from aws_cdk import aws_cloudfront as cloudfront
 from aws_cdk import aws_cloudfront_origins as origins
@@ -8,10 +11,42 @@ from aws_cdk import aws_s3 as s3
 from constructs import Construct
 
 from odin_infrastructure.config import (
+    ODIN_AWS_REGION,
     ODIN_CERTIFICATE_ARN,
     ODIN_DOMAIN_NAME,
+    ODIN_RESULTS_BUCKET,
     ODIN_UI_BUCKET,
 )
+from odin_infrastructure.odin_cluster import ApiDelivery
+from odin_infrastructure.perf_lint import suppress
+from odin_infrastructure.result_store import (
+    FORWARDED_HOST_FUNCTION,
+    ResultStoreSettings,
+)
+
+
+@dataclass(frozen=True)
+class ApiCacheRule:
+    """Cache GET/HEAD responses for `path_pattern` at the edge.
+
+    The cache key is the full query string. `Cache-Control` from the API takes
+    precedence, `default_ttl` only applies to responses without one.
+    """
+
+    path_pattern: str
+    default_ttl: Duration
+    max_ttl: Duration = Duration.days(365)
+
+
+# Behaviours are matched in order, so more specific patterns go first. Anything
+# under /rest_api/* not listed here (e.g. health_check) is never cached.
+DEFAULT_API_CACHE_RULES: tuple[ApiCacheRule, ...] = (
+    ApiCacheRule("/rest_api/*/level1/*", default_ttl=Duration.days(1)),
+    ApiCacheRule("/rest_api/*/level2/*", default_ttl=Duration.days(1)),
+    ApiCacheRule("/rest_api/*/scan/*", default_ttl=Duration.days(1)),
+    ApiCacheRule("/rest_api/*/vds/*", default_ttl=Duration.days(1)),
+    ApiCacheRule("/rest_api/*/freqmode_info/*", default_ttl=Duration.hours(1)),
+)
 
 
 class OdinUICloudfront(cloudfront.Distribution):
@@ -21,6 +56,10 @@ class OdinUICloudfront(cloudfront.Distribution):
         id: str,
         alb_name: aws_elasticloadbalancingv2.ILoadBalancerV2,
         zone: route53.IHostedZone,
+        api_cache_rules: tuple[ApiCacheRule, ...] = DEFAULT_API_CACHE_RULES,
+        origin_shield_region: str | None = ODIN_AWS_REGION,
+        delivery: ApiDelivery | None = None,
+        results: ResultStoreSettings | None = None,
     ) -> None:
         bucket = s3.Bucket(
             scope,
@@ -34,6 +73,111 @@ class OdinUICloudfront(cloudfront.Distribution):
             certificate_arn=ODIN_CERTIFICATE_ARN,
         )
 
+        def make_api_origin(
+            shield_region: str | None = None,
+        ) -> cloudfront.IOrigin:
+            if delivery is None:
+                return origins.LoadBalancerV2Origin(
+                    load_balancer=alb_name,
+                    protocol_policy=cloudfront.OriginProtocolPolicy.HTTP_ONLY,
+                    origin_shield_region=shield_region,
+                )
+            # The ALB certificate is for the API domain, not the ALB DNS name.
+            return origins.HttpOrigin(
+                delivery.domain_name,
+                protocol_policy=cloudfront.OriginProtocolPolicy.HTTPS_ONLY,
+                origin_ssl_protocols=[cloudfront.OriginSslPolicy.TLS_V1_2],
+                keepalive_timeout=delivery.origin_keepalive_timeout,
+                read_timeout=delivery.origin_read_timeout,
+                origin_shield_region=shield_region,
+            )
+
+        api_origin = make_api_origin()
+        # Cacheable routes get their own origin so that Origin Shield only
+        # collapses requests that can actually be served from cache.
+        cached_api_origin = make_api_origin(origin_shield_region)
+
+        precomputed: tuple[str, ...] = ()
+        precomputed_origin = cached_api_origin
+        forwarded_host: list[cloudfront.FunctionAssociation] = []
+        if results is not None:
+            precomputed = results.path_patterns
+            unknown = set(precomputed) - {rule.path_pattern for rule in api_cache_rules}
+            if unknown:
+                raise ValueError(f"No cache rule for result paths {sorted(unknown)}")
+            results_bucket = s3.Bucket(
+                scope,
+                "OdinResultsBucket",
+                bucket_name=ODIN_RESULTS_BUCKET,
+                block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+                enforce_ssl=True,
+            )
+            precomputed_origin = origins.OriginGroup(
+                primary_origin=origins.S3BucketOrigin.with_origin_access_control(
+                    results_bucket,
+                    origin_access_levels=[cloudfront.AccessLevel.READ],
+                ),
+                fallback_origin=cached_api_origin,
+                fallback_status_codes=[403, 404],
+            )
+            forwarded_host.append(
+                cloudfront.FunctionAssociation(
+                    function=cloudfront.Function(
+                        scope,
+                        "OdinForwardedHostFunction",
+                        code=cloudfront.FunctionCode.from_inline(
+                            FORWARDED_HOST_FUNCTION
+                        ),
+                        runtime=cloudfront.FunctionRuntime.JS_2_0,
+                    ),
+                    event_type=cloudfront.FunctionEventType.VIEWER_REQUEST,
+                )
+            )
+
+        api_behaviors: dict[str, cloudfront.BehaviorOptions] = {}
+        for index, rule in enumerate(api_cache_rules):
+            cache_policy = cloudfront.CachePolicy(
+                scope,
+                f"OdinApiCachePolicy{index}",
+                comment=f"Odin API {rule.path_pattern}",
+                default_ttl=rule.default_ttl,
+                min_ttl=Duration.seconds(0),
+                max_ttl=rule.max_ttl,
+                query_string_behavior=cloudfront.CacheQueryStringBehavior.all(),
+                header_behavior=cloudfront.CacheHeaderBehavior.none(),
+                cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+                enable_accept_encoding_gzip=True,
+                enable_accept_encoding_brotli=True,
+            )
+            from_results = rule.path_pattern in precomputed
+            api_behaviors[rule.path_pattern] = cloudfront.BehaviorOptions(
+                origin=precomputed_origin if from_results else cached_api_origin,
+                viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD_OPTIONS,
+                cached_methods=cloudfront.CachedMethods.CACHE_GET_HEAD_OPTIONS,
+                cache_policy=cache_policy,
+                # Compresses JSON between 1 kB and 10 MB with Brotli or gzip,
+                # needs the accept-encoding flags of the cache policy.
+                compress=True,
+                # The API builds absolute links from the Host header, so keep
+                # forwarding all viewer headers even though they are not part
+                # of the cache key. S3 rejects a foreign Host, the result store
+                # behaviours pass it on as X-Forwarded-Host instead.
+                origin_request_policy=(
+                    cloudfront.OriginRequestPolicy.ALL_VIEWER_EXCEPT_HOST_HEADER
+                    if from_results
+                    else cloudfront.OriginRequestPolicy.ALL_VIEWER
+                ),
+                function_associations=forwarded_host if from_results else None,
+            )
+        api_behaviors["/rest_api/*"] = cloudfront.BehaviorOptions(
+            origin=api_origin,
+            viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+            allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD_OPTIONS,
+            cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
+            origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER,
+        )
+
         super().__init__(
             scope,
             id,
@@ -46,21 +190,11 @@ class OdinUICloudfront(cloudfront.Distribution):
                 ),
                 viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
             ),
-            additional_behaviors={
-                "/rest_api/*": cloudfront.BehaviorOptions(
-                    origin=origins.LoadBalancerV2Origin(
-                        load_balancer=alb_name,
-                        protocol_policy=cloudfront.OriginProtocolPolicy.HTTP_ONLY,
-                    ),
-                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
-                    allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD_OPTIONS,
-                    cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
-                    origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER,
-                )
-            },
+            additional_behaviors=api_behaviors,
             default_root_object="index.html",
             domain_names=[ODIN_DOMAIN_NAME],
             certificate=cert,
+            http_version=cloudfront.HttpVersion.HTTP2_AND_3,
             error_responses=[
                 cloudfront.ErrorResponse(
                     http_status=403,
@@ -70,6 +204,13 @@ class OdinUICloudfront(cloudfront.Distribution):
             ],
         )
 
+        suppress(
+            self,
+            "OdinPerf1",
+            "Routes without a cache rule, e.g. health_check, must reach the API",
+            path_pattern="/rest_api/*",
+        )
+
         route53.ARecord(
             scope,
             "OdinUIAliasRecord",
@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+
+from aws_cdk import (
+    Duration,
+    RemovalPolicy,
+    Stack,
+    aws_applicationautoscaling,
+    aws_cloudwatch,
+    aws_ec2,
+    aws_ecr,
+    aws_ecs,
+    aws_logs,
+    aws_sqs,
+)
+
+from .config import ODIN_DATA_BUCKETS
+from .grant_buckets import grant_read_buckets
+
+
+@dataclass(frozen=True)
+class WorkerSettings:
+    """Sizing of the queue driven QSMR workers.
+
+    The first `on_demand_base` tasks always run on regular Fargate, the rest
+    is split between Fargate and Fargate Spot by weight.
+    """
+
+    repository_name: str = "odin-qsmr"
+    cpu: int = 1024
+    memory_limit_mib: int = 4096
+    min_capacity: int = 0
+    max_capacity: int = 20
+    on_demand_base: int = 0
+    on_demand_weight: int = 1
+    spot_weight: int = 3
+    visibility_timeout: Duration = Duration.minutes(30)
+    backlog_step: int = 100
+    max_message_age: Duration = Duration.minutes(15)
+
+
+class OdinWorkerService(aws_ecs.FargateService):
+    def __init__(
+        self,
+        scope: Stack,
+        id: str,
+        cluster: aws_ecs.ICluster,
+        settings: WorkerSettings = WorkerSettings(),
+        environment: dict[str, str] | None = None,
+        service_connect: bool = False,
+    ):
+        dead_letter_queue = aws_sqs.Queue(
+            scope,
+            "OdinWorkerDeadLetterQueue",
+            queue_name="odin-qsmr-jobs-dlq",
+            retention_period=Duration.days(14),
+        )
+        self.queue = aws_sqs.Queue(
+            scope,
+            "OdinWorkerQueue",
+            queue_name="odin-qsmr-jobs",
+            visibility_timeout=settings.visibility_timeout,
+            dead_letter_queue=aws_sqs.DeadLetterQueue(
+                queue=dead_letter_queue, max_receive_count=3
+            ),
+        )
+
+        log_group = aws_logs.LogGroup(
+            scope,
+            "OdinWorkerLogGroup",
+            log_group_name="/Odin/QSMR",
+            removal_policy=RemovalPolicy.DESTROY,
+            retention=aws_logs.RetentionDays.SIX_MONTHS,
+        )
+
+        worker_task = aws_ecs.FargateTaskDefinition(
+            scope,
+            "OdinWorkerTaskDefinition",
+            cpu=settings.cpu,
+            memory_limit_mib=settings.memory_limit_mib,
+        )
+        grant_read_buckets(scope, worker_task.task_role, ODIN_DATA_BUCKETS)
+        self.queue.grant_consume_messages(worker_task.task_role)
+
+        ecr_repository = aws_ecr.Repository.from_repository_name(
+            scope, "OdinWorkerRepo", settings.repository_name
+        )
+        worker_task.add_container(
+            "OdinWorkerContainer",
+            image=aws_ecs.ContainerImage.from_ecr_repository(ecr_repository),
+            environment={
+                **(environment or {}),
+                "ODIN_QSMR_QUEUE_URL": self.queue.queue_url,
+            },
+            logging=aws_ecs.AwsLogDriver(stream_prefix="QSMR", log_group=log_group),
+        )
+
+        super().__init__(
+            scope,
+            id,
+            cluster=cluster,
+            service_name="OdinQsmrWorkerService",
+            task_definition=worker_task,
+            desired_count=settings.min_capacity,
+            vpc_subnets=aws_ec2.SubnetSelection(
+                subnet_type=aws_ec2.SubnetType.PRIVATE_WITH_EGRESS
+            ),
+            capacity_provider_strategies=[
+                aws_ecs.CapacityProviderStrategy(
+                    capacity_provider="FARGATE",
+                    base=settings.on_demand_base,
+                    weight=settings.on_demand_weight,
+                ),
+                aws_ecs.CapacityProviderStrategy(
+                    capacity_provider="FARGATE_SPOT",
+                    weight=settings.spot_weight,
+                ),
+            ],
+        )
+
+        if service_connect:
+            # Client only, to reach the API in the default namespace.
+            self.enable_service_connect()
+
+        scaling = self.auto_scale_task_count(
+            min_capacity=settings.min_capacity,
+            max_capacity=settings.max_capacity,
+        )
+        change = aws_applicationautoscaling.ScalingInterval
+        visible = self.queue.metric_approximate_number_of_messages_visible(
+            period=Duration.minutes(1)
+        )
+        # Only scale in once nothing is waiting or being worked on.
+        backlog = aws_cloudwatch.MathExpression(
+            expression="visible + in_flight",
+            using_metrics={
+                "visible": visible,
+                "in_flight": self.queue.metric_approximate_number_of_messages_not_visible(
+                    period=Duration.minutes(1)
+                ),
+            },
+            period=Duration.minutes(1),
+        )
+        scaling.scale_on_metric(
+            "QueueDepthScaling",
+            metric=visible,
+            scaling_steps=[
+                change(upper=0, change=0),
+                change(lower=1, change=+1),
+                change(lower=settings.backlog_step, change=+5),
+            ],
+            cooldown=Duration.seconds(60),
+        )
+        scaling.scale_on_metric(
+            "QueueAgeScaling",
+            metric=self.queue.metric_approximate_age_of_oldest_message(
+                period=Duration.minutes(1)
+            ),
+            scaling_steps=[
+                change(upper=settings.max_message_age.to_seconds() / 2, change=0),
+                change(lower=settings.max_message_age.to_seconds(), change=+2),
+            ],
+            cooldown=Duration.seconds(120),
+        )
+        scaling.scale_on_metric(
+            "QueueDrainedScaling",
+            metric=backlog,
+            scaling_steps=[
+                change(upper=0, change=-1),
+                change(lower=1, change=0),
+            ],
+            cooldown=Duration.seconds(300),
+            evaluation_periods=5,
+        )
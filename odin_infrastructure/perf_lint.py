@@ -0,0 +1,228 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import jsii
+from aws_cdk import Annotations, CfnResource, IAspect, Stack
+from constructs import IConstruct
+
+SUPPRESSIONS = "odin:perf-lint-suppressions"
+# Managed CachePolicy.CACHING_DISABLED
+CACHING_DISABLED = "4135ea2d-6df8-44a3-9df3-4b5a84be39ad"
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+MAX_HEALTH_CHECK_INTERVAL = 30
+MAX_FAILOVER_SECONDS = 120
+
+Properties = dict[str, Any]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A performance anti-pattern in the properties of one resource type."""
+
+    id: str
+    resource_type: str
+    error: bool
+    check: Callable[[CfnResource, Properties], str | None]
+
+
+def _caching_disabled_on_reads(
+    resource: CfnResource, properties: Properties
+) -> str | None:
+    config = properties.get("distributionConfig", {})
+    behaviors = [config.get("defaultCacheBehavior", {})]
+    behaviors += config.get("cacheBehaviors", [])
+    exempt = _suppressed_paths(resource, "OdinPerf1")
+    paths = [
+        behavior.get("pathPattern", "*")
+        for behavior in behaviors
+        if behavior.get("cachePolicyId") == CACHING_DISABLED
+        and set(behavior.get("allowedMethods", ["GET", "HEAD"])) <= READ_ONLY_METHODS
+        and behavior.get("pathPattern", "*") not in exempt
+    ]
+    if not paths:
+        return None
+    return (
+        f"CACHING_DISABLED on read-only behaviours {', '.join(paths)},"
+        " add a cache policy that honours Cache-Control"
+    )
+
+
+def _nat_without_s3_endpoint(
+    resource: CfnResource, properties: Properties
+) -> str | None:
+    if properties.get("sourceDestCheck") is not False:
+        return None
+    stack = Stack.of(resource)
+    for construct in stack.node.find_all():
+        if (
+            isinstance(construct, CfnResource)
+            and construct.cfn_resource_type == "AWS::EC2::VPCEndpoint"
+        ):
+            endpoint = _properties(construct)
+            # Gateway is the default type, the service name is usually a
+            # Fn::Join ending with ".s3".
+            service = json.dumps(endpoint.get("serviceName"))
+            gateway = endpoint.get("vpcEndpointType", "Gateway") == "Gateway"
+            if gateway and ('".s3"' in service or service.endswith('.s3"')):
+                return None
+    return (
+        "NAT instance without an S3 gateway endpoint, S3 traffic from the"
+        " private subnets is limited by the NAT instance bandwidth"
+    )
+
+
+def _burstable_database(resource: CfnResource, properties: Properties) -> str | None:
+    instance_type = properties.get("instanceType", "")
+    if not isinstance(instance_type, str) or not instance_type.startswith("t"):
+        return None
+    if "service mongod start" not in json.dumps(properties.get("userData")):
+        return None
+    return (
+        f"mongod runs on burstable {instance_type}, it is throttled to the"
+        " baseline CPU when the credits run out"
+    )
+
+
+def _burstable_cache(resource: CfnResource, properties: Properties) -> str | None:
+    node_type = properties.get("cacheNodeType", "")
+    if not isinstance(node_type, str) or not node_type.startswith("cache.t"):
+        return None
+    return f"Cache nodes of burstable type {node_type}"
+
+
+def _slow_target_health_check(
+    resource: CfnResource, properties: Properties
+) -> str | None:
+    interval = properties.get("healthCheckIntervalSeconds", 30)
+    unhealthy = properties.get("unhealthyThresholdCount", 2)
+    if not isinstance(interval, int) or not isinstance(unhealthy, int):
+        return None
+    if (
+        interval <= MAX_HEALTH_CHECK_INTERVAL
+        and interval * unhealthy <= MAX_FAILOVER_SECONDS
+    ):
+        return None
+    return (
+        f"Health check every {interval} s with {unhealthy} failures, a hung"
+        f" target stays in rotation for {interval * unhealthy} s"
+    )
+
+
+def _slow_or_blocking_containers(
+    resource: CfnResource, properties: Properties
+) -> str | None:
+    problems = []
+    for container in properties.get("containerDefinitions", []):
+        name = container.get("name")
+        health_check = container.get("healthCheck")
+        if health_check is not None:
+            # ECS defaults, 30 s interval and 3 retries.
+            seconds = health_check.get("interval", 30) * health_check.get("retries", 3)
+            if seconds > MAX_FAILOVER_SECONDS:
+                problems.append(f"{name} takes {seconds} s to be marked unhealthy")
+        log_configuration = container.get("logConfiguration", {})
+        if (
+            log_configuration.get("logDriver") == "awslogs"
+            and log_configuration.get("options", {}).get("mode") != "non-blocking"
+        ):
+            problems.append(f"{name} logs in blocking mode")
+    return ", ".join(problems) or None
+
+
+RULES: tuple[Rule, ...] = (
+    Rule(
+        "OdinPerf1",
+        "AWS::CloudFront::Distribution",
+        False,
+        _caching_disabled_on_reads,
+    ),
+    Rule("OdinPerf2", "AWS::EC2::Instance", True, _nat_without_s3_endpoint),
+    Rule("OdinPerf3", "AWS::EC2::Instance", False, _burstable_database),
+    Rule("OdinPerf4", "AWS::ElastiCache::ReplicationGroup", False, _burstable_cache),
+    Rule(
+        "OdinPerf5",
+        "AWS::ElasticLoadBalancingV2::TargetGroup",
+        True,
+        _slow_target_health_check,
+    ),
+    Rule("OdinPerf6", "AWS::ECS::TaskDefinition", False, _slow_or_blocking_containers),
+)
+
+
+def suppress(
+    construct: IConstruct,
+    rule_id: str,
+    reason: str,
+    path_pattern: str | None = None,
+) -> None:
+    """Silence `rule_id` for `construct` and everything below it.
+
+    Rules that report CloudFront behaviours can be silenced for a single
+    `path_pattern` instead, the other behaviours are still checked.
+    """
+    data = {"id": rule_id, "reason": reason}
+    if path_pattern is not None:
+        data["pathPattern"] = path_pattern
+    construct.node.add_metadata(SUPPRESSIONS, data)
+
+
+def _suppressions(construct: IConstruct, rule_id: str) -> list[dict[str, str]]:
+    return [
+        entry.data
+        for scope in construct.node.scopes
+        for entry in scope.node.metadata
+        if entry.type == SUPPRESSIONS and entry.data["id"] == rule_id
+    ]
+
+
+def _suppressed(construct: IConstruct, rule_id: str) -> bool:
+    return any("pathPattern" not in data for data in _suppressions(construct, rule_id))
+
+
+def _suppressed_paths(construct: IConstruct, rule_id: str) -> set[str]:
+    return {
+        data["pathPattern"]
+        for data in _suppressions(construct, rule_id)
+        if "pathPattern" in data
+    }
+
+
+def _properties(resource: CfnResource) -> Properties:
+    # L1 properties are not part of the Python API, cdk-nag reads them the
+    # same way.
+    return Stack.of(resource).resolve(jsii.get(resource, "cfnProperties"))
+
+
+@jsii.implements(IAspect)
+class PerformanceChecks:
+    """Report performance anti-patterns as synth warnings and errors.
+
+    Errors make `cdk synth` fail. A finding that is intended is silenced with
+    `suppress(construct, rule_id, reason)`.
+    """
+
+    def __init__(self, rules: tuple[Rule, ...] = RULES) -> None:
+        self.rules = rules
+
+    def visit(self, node: IConstruct) -> None:
+        if not isinstance(node, CfnResource):
+            return
+        rules = [
+            rule
+            for rule in self.rules
+            if rule.resource_type == node.cfn_resource_type
+            and not _suppressed(node, rule.id)
+        ]
+        if not rules:
+            return
+        properties = _properties(node)
+        for rule in rules:
+            message = rule.check(node, properties)
+            if message is None:
+                continue
+            if rule.error:
+                Annotations.of(node).add_error(f"[{rule.id}] {message}")
+            else:
+                # The message ends with "[ack: <rule id>]".
+                Annotations.of(node).add_warning_v2(rule.id, message)
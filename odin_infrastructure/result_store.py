@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+
+# Copies the viewer Host header, which S3 origins must not receive, so the
+# API can still build absolute links behind an origin group.
+FORWARDED_HOST_FUNCTION = """
+function handler(event) {
+  var request = event.request;
+  request.headers["x-forwarded-host"] = { value: request.headers.host.value };
+  return request;
+}
+"""
+
+
+@dataclass(frozen=True)
+class ResultStoreSettings:
+    """Precomputed API responses in S3, served by CloudFront before the API.
+
+    Requests for `path_patterns` go to an origin group that reads the bucket
+    first and falls back to the ALB when S3 answers 403 or 404 (the object
+    does not exist). Objects are keyed by the request path without the
+    leading slash, e.g. `rest_api/v5/vds/...`, and must carry the
+    `Content-Type` of the API response. S3 ignores the query string, so only
+    responses that do not depend on it may be written. The API and worker
+    tasks can write the bucket, named by ODINAPI_RESULTS_BUCKET. The name is
+    fixed (ODIN_RESULTS_BUCKET) since the network stack opens its S3
+    endpoint for it.
+    """
+
+    path_patterns: tuple[str, ...] = ("/rest_api/*/level2/*", "/rest_api/*/vds/*")
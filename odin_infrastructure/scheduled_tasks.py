@@ -0,0 +1,280 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import cast
+
+from aws_cdk import Duration, RemovalPolicy, Size
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_ecs as ecs
+from aws_cdk import aws_events as events
+from aws_cdk import aws_events_targets as targets
+from aws_cdk import aws_logs as logs
+from aws_cdk import aws_ssm as ssm
+from constructs import Construct
+
+from .config import ODIN_DOMAIN_NAME
+from .mongo import METRICS_NAMESPACE, MONGOSH, MongoInstance
+from .odin_cluster import OdinService
+
+LOG_GROUP = "/Odin/Maintenance"
+SCRIPTS = Path(__file__).parent / "scripts"
+MONGOSH_SCRIPT = f'{MONGOSH} "$MONGO_URI" --eval "$ODIN_SCRIPT"'
+WARM_UP = (
+    "for root in $ODIN_WARM_UP_ROOTS; do for path in $ODIN_WARM_UP_PATHS; do"
+    " for i in $(seq $ODIN_WARM_UP_REQUESTS); do"
+    ' curl -s -o /dev/null --max-time 120 -w "%{http_code} %{time_total}s'
+    ' $root$path\\n" "$root$path" & done; wait; done; done'
+)
+# (metric name, JSON field) of the collectionStats lines.
+COLLECTION_METRICS = (
+    ("CollectionDocuments", "count"),
+    ("CollectionSize", "size"),
+    ("CollectionStorageSize", "storageSize"),
+    ("CollectionIndexSize", "totalIndexSize"),
+)
+
+
+@dataclass(frozen=True)
+class MaintenanceSettings:
+    """Jobs run as one-off Fargate tasks in OdinApiCluster.
+
+    Schedules are in UTC, None disables a job. The warm-up job requests
+    `warm_up_paths` `warm_up_requests` times each through the ALB, to reach
+    every new task, and through CloudFront, to fill the edge caches, each
+    time a deployment of the API service completes.
+
+    Index maintenance only reports unused indexes that have existed, and
+    mongod has run, for at least `unused_index_min_age`. It also drops and
+    recreates `rebuild_indexes` ("collection.index") through the primary,
+    which builds them on all members at once. Secondaries reject index
+    changes, so a rolling rebuild one member at a time needs the member
+    restarted standalone and is left to an operator.
+    """
+
+    database: str = "odin"
+    index_maintenance: events.Schedule | None = events.Schedule.cron(
+        minute="0", hour="2", week_day="SUN"
+    )
+    collection_stats: events.Schedule | None = events.Schedule.cron(
+        minute="30", hour="3"
+    )
+    unused_index_min_age: Duration = Duration.days(30)
+    rebuild_indexes: tuple[str, ...] = ()
+    warm_up: bool = True
+    warm_up_paths: tuple[str, ...] = (
+        "/rest_api/health_check",
+        "/rest_api/v5/level2/projects/",
+        "/rest_api/v5/vds/",
+    )
+    warm_up_requests: int = 20
+    mongo_image: str = "mongo:6.0"
+    curl_image: str = "curlimages/curl:8.10.1"
+
+    def __post_init__(self) -> None:
+        if self.warm_up_requests < 1:
+            raise ValueError("warm_up_requests must be positive")
+        for index in self.rebuild_indexes:
+            collection, _, name = index.partition(".")
+            if not collection or not name or "," in index:
+                raise ValueError(
+                    f"rebuild_indexes entry {index!r} is not collection.index"
+                )
+            if name == "_id_":
+                raise ValueError("The _id_ index cannot be rebuilt")
+
+
+class OdinScheduledTask(events.Rule):
+    """Run `command` as a one-off Fargate task on a schedule or an event.
+
+    EventBridge retries RunTask failures (e.g. no Fargate capacity) for up to
+    two hours.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        cluster: ecs.ICluster,
+        image: str,
+        command: list[str],
+        log_group: logs.ILogGroup,
+        description: str,
+        schedule: events.Schedule | None = None,
+        event_pattern: events.EventPattern | None = None,
+        environment: dict[str, str] | None = None,
+        cpu: int = 256,
+        memory_limit_mib: int = 512,
+    ) -> None:
+        task_definition = ecs.FargateTaskDefinition(
+            scope,
+            f"{id}TaskDefinition",
+            family=id,
+            cpu=cpu,
+            memory_limit_mib=memory_limit_mib,
+        )
+        task_definition.add_container(
+            f"{id}Container",
+            image=ecs.ContainerImage.from_registry(image),
+            command=command,
+            environment=environment,
+            logging=ecs.AwsLogDriver(
+                stream_prefix=id,
+                log_group=log_group,
+                mode=ecs.AwsLogDriverMode.NON_BLOCKING,
+                max_buffer_size=Size.mebibytes(25),
+            ),
+        )
+        super().__init__(
+            scope,
+            id,
+            description=description,
+            schedule=schedule,
+            event_pattern=event_pattern,
+        )
+        self.task_definition = task_definition
+        self.add_target(
+            targets.EcsTask(
+                cluster=cluster,
+                task_definition=task_definition,
+                subnet_selection=ec2.SubnetSelection(
+                    subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+                ),
+                retry_attempts=5,
+                max_event_age=Duration.hours(2),
+            )
+        )
+
+
+def _parameter(scope: Construct, id: str, name: str) -> str:
+    """Value of an SSM parameter, reusing the import made by OdinService."""
+    existing = scope.node.try_find_child(id)
+    parameter = (
+        cast(ssm.IStringParameter, existing)
+        if existing is not None
+        else ssm.StringParameter.from_string_parameter_name(scope, id, name)
+    )
+    return parameter.string_value
+
+
+def add_maintenance_tasks(
+    scope: Construct,
+    cluster: ecs.ICluster,
+    mongo: MongoInstance,
+    service: OdinService,
+    settings: MaintenanceSettings,
+) -> list[OdinScheduledTask]:
+    """Schedule the Mongo maintenance jobs and the post-deployment warm-up.
+
+    The jobs print JSON lines to /Odin/Maintenance, which the metric filters
+    turn into per-collection metrics in the Odin/Mongo namespace.
+    """
+    log_group = logs.LogGroup(
+        scope,
+        "OdinMaintenanceLogGroup",
+        log_group_name=LOG_GROUP,
+        removal_policy=RemovalPolicy.DESTROY,
+        retention=logs.RetentionDays.SIX_MONTHS,
+    )
+    mongo_environment = {
+        "MONGO_URI": "mongodb://" + ",".join(mongo.member_hosts),
+        "MONGO_DATABASE": settings.database,
+        "MONGO_USER": _parameter(scope, "OdinMongoUser", "/odin/mongo/user"),
+        "MONGO_PASSWORD": _parameter(
+            scope, "OdinMongoPassword", "/odin/mongo/password"
+        ),
+    }
+    if mongo.replica_set is not None:
+        mongo_environment["MONGO_URI"] += (
+            f"/?replicaSet={mongo.replica_set.name}"
+            "&readPreference=secondaryPreferred"
+        )
+
+    tasks = []
+    if settings.index_maintenance is not None:
+        tasks.append(
+            OdinScheduledTask(
+                scope,
+                "OdinMongoIndexMaintenance",
+                cluster,
+                image=settings.mongo_image,
+                command=["sh", "-c", MONGOSH_SCRIPT],
+                log_group=log_group,
+                description="Compact the Odin collections, report unused indexes",
+                schedule=settings.index_maintenance,
+                environment={
+                    **mongo_environment,
+                    # Secondaries first, the preferred primary last.
+                    "MONGO_HOSTS": ",".join(reversed(mongo.member_hosts)),
+                    "MIN_INDEX_AGE_DAYS": str(settings.unused_index_min_age.to_days()),
+                    "REBUILD_INDEXES": ",".join(settings.rebuild_indexes),
+                    "ODIN_SCRIPT": (SCRIPTS / "mongo_maintenance.js").read_text(),
+                },
+            )
+        )
+        logs.MetricFilter(
+            scope,
+            "OdinMongoUnusedIndexFilter",
+            log_group=log_group,
+            filter_pattern=logs.FilterPattern.string_value(
+                "$.event", "=", "unusedIndex"
+            ),
+            metric_namespace=METRICS_NAMESPACE,
+            metric_name="UnusedIndexes",
+            metric_value="1",
+            dimensions={"Collection": "$.ns"},
+        )
+    if settings.collection_stats is not None:
+        tasks.append(
+            OdinScheduledTask(
+                scope,
+                "OdinMongoCollectionStats",
+                cluster,
+                image=settings.mongo_image,
+                command=["sh", "-c", MONGOSH_SCRIPT],
+                log_group=log_group,
+                description="Publish the size of the Odin collections",
+                schedule=settings.collection_stats,
+                environment={
+                    **mongo_environment,
+                    "ODIN_SCRIPT": (SCRIPTS / "mongo_collection_stats.js").read_text(),
+                },
+            )
+        )
+        for metric_name, field in COLLECTION_METRICS:
+            logs.MetricFilter(
+                scope,
+                f"OdinMongo{metric_name}Filter",
+                log_group=log_group,
+                filter_pattern=logs.FilterPattern.string_value(
+                    "$.event", "=", "collectionStats"
+                ),
+                metric_namespace=METRICS_NAMESPACE,
+                metric_name=metric_name,
+                metric_value=f"$.{field}",
+                dimensions={"Collection": "$.ns"},
+            )
+    if settings.warm_up:
+        tasks.append(
+            OdinScheduledTask(
+                scope,
+                "OdinApiWarmUp",
+                cluster,
+                image=settings.curl_image,
+                command=["sh", "-c", WARM_UP],
+                log_group=log_group,
+                description="Warm up new API tasks and the edge caches",
+                event_pattern=events.EventPattern(
+                    source=["aws.ecs"],
+                    detail_type=["ECS Deployment State Change"],
+                    resources=[service.service.service_arn],
+                    detail={"eventName": ["SERVICE_DEPLOYMENT_COMPLETED"]},
+                ),
+                environment={
+                    "ODIN_WARM_UP_ROOTS": (
+                        f"{service.api_root} https://{ODIN_DOMAIN_NAME}"
+                    ),
+                    "ODIN_WARM_UP_PATHS": " ".join(settings.warm_up_paths),
+                    "ODIN_WARM_UP_REQUESTS": str(settings.warm_up_requests),
+                },
+            )
+        )
+    return tasks
@@ -0,0 +1,16 @@
+// Prints size statistics of every collection of MONGO_DATABASE as one JSON
+// line each, turned into Odin/Mongo metrics by /Odin/Maintenance filters.
+const target = db.getSiblingDB(process.env.MONGO_DATABASE);
+for (const name of target.getCollectionNames()) {
+  const stats = target.runCommand({ collStats: name });
+  print(
+    JSON.stringify({
+      event: "collectionStats",
+      ns: stats.ns,
+      count: stats.count,
+      size: stats.size,
+      storageSize: stats.storageSize,
+      totalIndexSize: stats.totalIndexSize,
+    })
+  );
+}
@@ -0,0 +1,94 @@
+// Compacts every collection of MONGO_DATABASE one host at a time, in the
+// order of MONGO_HOSTS, and logs indexes that were not used since mongod
+// started or the index was built, if that is at least MIN_INDEX_AGE_DAYS
+// ago. The indexes in REBUILD_INDEXES (comma separated collection.index) are
+// dropped and recreated through the writable primary, which builds them on
+// every member. Prints one JSON line per result for the /Odin/Maintenance
+// metric filters.
+const database = process.env.MONGO_DATABASE;
+const minIndexAgeMillis =
+  Number(process.env.MIN_INDEX_AGE_DAYS || 0) * 24 * 60 * 60 * 1000;
+const rebuild = (process.env.REBUILD_INDEXES || "")
+  .split(",")
+  .filter((entry) => entry !== "");
+
+function rebuildIndex(target, host, entry) {
+  const split = entry.indexOf(".");
+  const collection = target.getCollection(entry.slice(0, split));
+  const name = entry.slice(split + 1);
+  const started = Date.now();
+  let error;
+  try {
+    const spec = collection.getIndexes().find((index) => index.name === name);
+    if (spec === undefined) {
+      throw new Error(`no index ${name}`);
+    }
+    const { v, key, ns, ...options } = spec;
+    collection.dropIndex(name);
+    collection.createIndex(key, options);
+  } catch (e) {
+    error = e.message;
+  }
+  print(
+    JSON.stringify({
+      event: "rebuildIndex",
+      host: host,
+      ns: collection.getFullName(),
+      index: name,
+      ok: error === undefined ? 1 : 0,
+      durationMillis: Date.now() - started,
+      error: error,
+    })
+  );
+}
+
+for (const host of process.env.MONGO_HOSTS.split(",")) {
+  const client = new Mongo(`mongodb://${host}/?directConnection=true`);
+  const admin = client.getDB("admin");
+  admin.auth(process.env.MONGO_USER, process.env.MONGO_PASSWORD);
+  const target = client.getDB(database);
+  for (const name of target.getCollectionNames()) {
+    const ns = `${database}.${name}`;
+    const started = Date.now();
+    const result = target.runCommand({ compact: name });
+    print(
+      JSON.stringify({
+        event: "compact",
+        host: host,
+        ns: ns,
+        ok: result.ok,
+        bytesFreed: result.bytesFreed || 0,
+        durationMillis: Date.now() - started,
+        error: result.errmsg,
+      })
+    );
+    const indexes = target
+      .getCollection(name)
+      .aggregate([{ $indexStats: {} }])
+      .toArray();
+    for (const index of indexes) {
+      const age = Date.now() - index.accesses.since.getTime();
+      if (
+        Number(index.accesses.ops) === 0 &&
+        index.name !== "_id_" &&
+        age >= minIndexAgeMillis
+      ) {
+        print(
+          JSON.stringify({
+            event: "unusedIndex",
+            host: host,
+            ns: ns,
+            index: index.name,
+          })
+        );
+      }
+    }
+  }
+  // Secondaries do not accept index changes; a standalone mongod is writable
+  // too.
+  if (admin.runCommand({ hello: 1 }).isWritablePrimary) {
+    for (const entry of rebuild) {
+      rebuildIndex(target, host, entry);
+    }
+  }
+}
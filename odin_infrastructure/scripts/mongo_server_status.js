@@ -0,0 +1,34 @@
+// Prints mongod serverStatus counters as CloudWatch MetricDatum JSON, used
+// with `aws cloudwatch put-metric-data --metric-data`. Opcounters are
+// cumulative, use RATE() on them in dashboards and alarms.
+const status = db.adminCommand({ serverStatus: 1 });
+const cache = status.wiredTiger.cache;
+const tickets = status.wiredTiger.concurrentTransactions;
+const metrics = {
+  OpcountersInsert: [status.opcounters.insert, "Count"],
+  OpcountersQuery: [status.opcounters.query, "Count"],
+  OpcountersUpdate: [status.opcounters.update, "Count"],
+  OpcountersDelete: [status.opcounters.delete, "Count"],
+  OpcountersGetmore: [status.opcounters.getmore, "Count"],
+  OpcountersCommand: [status.opcounters.command, "Count"],
+  ConnectionsCurrent: [status.connections.current, "Count"],
+  ConnectionsAvailable: [status.connections.available, "Count"],
+  GlobalLockQueueReaders: [status.globalLock.currentQueue.readers, "Count"],
+  GlobalLockQueueWriters: [status.globalLock.currentQueue.writers, "Count"],
+  WiredTigerCacheBytes: [cache["bytes currently in the cache"], "Bytes"],
+  WiredTigerCacheMaxBytes: [cache["maximum bytes configured"], "Bytes"],
+  WiredTigerCacheDirtyBytes: [cache["tracked dirty bytes in the cache"], "Bytes"],
+  WiredTigerPagesReadIntoCache: [cache["pages read into cache"], "Count"],
+  WiredTigerReadTicketsAvailable: [tickets.read.available, "Count"],
+  WiredTigerWriteTicketsAvailable: [tickets.write.available, "Count"],
+};
+print(
+  JSON.stringify(
+    Object.entries(metrics).map(([name, [value, unit]]) => ({
+      MetricName: name,
+      Value: Number(value),
+      Unit: unit,
+      Dimensions: [{ Name: "InstanceId", Value: process.env.INSTANCE_ID }],
+    }))
+  )
+);
@@ -0,0 +1,137 @@
+import dataclasses
+import json
+import re
+from dataclasses import dataclass
+
+from constructs import Node
+
+CONTEXT_KEY = "odin:sizing"
+OVERRIDES_CONTEXT_KEY = "odin:sizing-overrides"
+DEFAULT_PROFILE = "prod"
+
+# Valid Fargate task memory (MiB) for each CPU value (CPU units).
+FARGATE_MEMORY: dict[int, range] = {
+    256: range(512, 2048 + 1, 512),
+    512: range(1024, 4096 + 1, 1024),
+    1024: range(2048, 8192 + 1, 1024),
+    2048: range(4096, 16384 + 1, 1024),
+    4096: range(8192, 30720 + 1, 1024),
+    8192: range(16384, 61440 + 1, 4096),
+    16384: range(32768, 122880 + 1, 8192),
+}
+INSTANCE_TYPE = re.compile(r"^[a-z][a-z0-9-]*\.(nano|micro|small|medium|\d*x?large)$")
+
+
+@dataclass(frozen=True)
+class SizingProfile:
+    """Capacity of everything in OdinAPIStack that is sized by hand."""
+
+    api_cpu: int
+    api_memory_limit_mib: int
+    api_min_capacity: int
+    api_max_capacity: int
+    mongo_instance_type: str
+    admin_instance_type: str
+    nat_instance_type: str
+
+    def __post_init__(self) -> None:
+        if self.api_cpu not in FARGATE_MEMORY:
+            raise ValueError(f"api_cpu {self.api_cpu} is not a Fargate CPU value")
+        if self.api_memory_limit_mib not in FARGATE_MEMORY[self.api_cpu]:
+            raise ValueError(
+                f"api_memory_limit_mib {self.api_memory_limit_mib} is not valid"
+                f" with api_cpu {self.api_cpu}"
+            )
+        if not 0 < self.api_min_capacity <= self.api_max_capacity:
+            raise ValueError("Need 0 < api_min_capacity <= api_max_capacity")
+        for field in (
+            "mongo_instance_type",
+            "admin_instance_type",
+            "nat_instance_type",
+        ):
+            if not INSTANCE_TYPE.match(getattr(self, field)):
+                raise ValueError(f"{field} {getattr(self, field)!r} is malformed")
+
+
+SIZING_PROFILES: dict[str, SizingProfile] = {
+    "small": SizingProfile(
+        api_cpu=1024,
+        api_memory_limit_mib=2048,
+        api_min_capacity=1,
+        api_max_capacity=2,
+        mongo_instance_type="t3.medium",
+        admin_instance_type="t3.nano",
+        nat_instance_type="t3.micro",
+    ),
+    "prod": SizingProfile(
+        api_cpu=2048,
+        api_memory_limit_mib=4096,
+        api_min_capacity=1,
+        api_max_capacity=10,
+        mongo_instance_type="t3.large",
+        admin_instance_type="t3.nano",
+        nat_instance_type="t3.small",
+    ),
+    "reprocessing": SizingProfile(
+        api_cpu=4096,
+        api_memory_limit_mib=8192,
+        api_min_capacity=2,
+        api_max_capacity=30,
+        mongo_instance_type="r6i.xlarge",
+        admin_instance_type="t3.nano",
+        nat_instance_type="c6in.large",
+    ),
+}
+
+
+def sizing_from_context(node: Node) -> SizingProfile:
+    """Select a profile with `-c odin:sizing=<name>`.
+
+    Single values can be changed for experiments with
+    `-c 'odin:sizing-overrides={"api_max_capacity": 20}'`.
+    """
+    name = node.try_get_context(CONTEXT_KEY) or DEFAULT_PROFILE
+    if name not in SIZING_PROFILES:
+        raise ValueError(
+            f"Unknown sizing profile {name!r}, choose from {sorted(SIZING_PROFILES)}"
+        )
+    overrides = node.try_get_context(OVERRIDES_CONTEXT_KEY) or {}
+    if isinstance(overrides, str):
+        overrides = json.loads(overrides)
+    unknown = set(overrides) - {
+        field.name for field in dataclasses.fields(SizingProfile)
+    }
+    if unknown:
+        raise ValueError(f"Unknown sizing overrides {sorted(unknown)}")
+    return dataclasses.replace(SIZING_PROFILES[name], **overrides)
+
+
+# GiB of memory per vCPU of the compute, general purpose and memory families.
+MEMORY_PER_VCPU = {"c": 2, "m": 4, "r": 8}
+BURSTABLE_MEMORY_GIB = {
+    "nano": 0.5,
+    "micro": 1,
+    "small": 2,
+    "medium": 4,
+    "large": 8,
+    "xlarge": 16,
+    "2xlarge": 32,
+}
+
+
+def instance_memory_gib(instance_type: str) -> float:
+    """Memory of the c/m/r/t instance types, without an EC2 API lookup."""
+    family, size = instance_type.split(".", 1)
+    if family.startswith("t") and size in BURSTABLE_MEMORY_GIB:
+        return BURSTABLE_MEMORY_GIB[size]
+    if family[0] not in MEMORY_PER_VCPU:
+        raise ValueError(f"Unknown memory size of {instance_type}")
+    if size == "medium":
+        vcpus = 1
+    elif size == "large":
+        vcpus = 2
+    elif size.endswith("xlarge"):
+        vcpus = 4 * int(size.removesuffix("xlarge") or 1)
+    else:
+        raise ValueError(f"Unknown memory size of {instance_type}")
+    return vcpus * MEMORY_PER_VCPU[family[0]]
@@ -0,0 +1,106 @@
+from aws_cdk import DefaultStackSynthesizer, Stack
+from aws_cdk import aws_ec2 as ec2
+from aws_cdk import aws_iam as iam
+
+PRIVATE_SUBNETS = [
+    ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+    ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED),
+]
+
+INTERFACE_ENDPOINTS = {
+    "OdinEcrApiEndpoint": ec2.InterfaceVpcEndpointAwsService.ECR,
+    "OdinEcrDockerEndpoint": ec2.InterfaceVpcEndpointAwsService.ECR_DOCKER,
+    "OdinLogsEndpoint": ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_LOGS,
+    "OdinSsmEndpoint": ec2.InterfaceVpcEndpointAwsService.SSM,
+}
+
+
+def bucket_arns(bucket_names: list[str]) -> list[str]:
+    return [f"arn:aws:s3:::{name}" for name in bucket_names] + [
+        f"arn:aws:s3:::{name}/*" for name in bucket_names
+    ]
+
+
+def file_assets_arn(scope: Stack) -> str:
+    """Objects in the bootstrap bucket that `cdk deploy` publishes assets to."""
+    qualifier = (
+        scope.synthesizer.bootstrap_qualifier
+        or DefaultStackSynthesizer.DEFAULT_QUALIFIER
+    )
+    name = (
+        DefaultStackSynthesizer.DEFAULT_FILE_ASSETS_BUCKET_NAME.replace(
+            "${Qualifier}", qualifier
+        )
+        .replace("${AWS::AccountId}", scope.account)
+        .replace("${AWS::Region}", scope.region)
+    )
+    return f"arn:aws:s3:::{name}/*"
+
+
+def add_vpc_endpoints(
+    scope: Stack,
+    vpc: ec2.IVpc,
+    bucket_names: list[str],
+    upload_bucket_names: list[str] | None = None,
+    interface_endpoints: bool = False,
+) -> ec2.GatewayVpcEndpoint:
+    """Keep S3 (and optionally ECR, Logs and SSM) traffic off the NAT instance.
+
+    The S3 endpoint only allows reading `bucket_names`, reading and writing
+    objects in `upload_bucket_names`, the CDK file assets of any stack (e.g.
+    the FireLens config) and the AWS owned buckets behind ECR image layers
+    and the Amazon Linux yum repositories.
+    Anything else in the private subnets that needs S3 must be added to the
+    endpoint policy.
+    """
+    s3_endpoint = vpc.add_gateway_endpoint(
+        "OdinS3Endpoint",
+        service=ec2.GatewayVpcEndpointAwsService.S3,
+        subnets=PRIVATE_SUBNETS,
+    )
+    s3_endpoint.add_to_policy(
+        iam.PolicyStatement(
+            principals=[iam.AnyPrincipal()],
+            actions=["s3:GetObject", "s3:ListBucket", "s3:GetBucketLocation"],
+            resources=bucket_arns(bucket_names),
+        )
+    )
+    s3_endpoint.add_to_policy(
+        iam.PolicyStatement(
+            principals=[iam.AnyPrincipal()],
+            actions=["s3:GetObject"],
+            resources=[
+                f"arn:aws:s3:::prod-{scope.region}-starport-layer-bucket/*",
+                f"arn:aws:s3:::amazonlinux-2-repos-{scope.region}/*",
+            ],
+        )
+    )
+    if upload_bucket_names:
+        s3_endpoint.add_to_policy(
+            iam.PolicyStatement(
+                principals=[iam.AnyPrincipal()],
+                actions=["s3:GetObject", "s3:PutObject"],
+                resources=[f"arn:aws:s3:::{name}/*" for name in upload_bucket_names],
+            )
+        )
+    # Covers every asset hash, so a new asset only needs its own stack deployed.
+    s3_endpoint.add_to_policy(
+        iam.PolicyStatement(
+            principals=[iam.AnyPrincipal()],
+            actions=["s3:GetObject"],
+            resources=[file_assets_arn(scope)],
+        )
+    )
+
+    if interface_endpoints:
+        for id, service in INTERFACE_ENDPOINTS.items():
+            vpc.add_interface_endpoint(
+                id,
+                service=service,
+                subnets=ec2.SubnetSelection(
+                    subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+                ),
+                private_dns_enabled=True,
+            )
+
+    return s3_endpoint
@@ -0,0 +1,168 @@
+"""Synth time and template size regression checks.
+
+Measured values are compared with baseline.json. After an intended change,
+regenerate it with
+
+    ODIN_BENCHMARK_UPDATE=1 pytest tests/benchmark
+    ODIN_BENCHMARK_UPDATE=1 pytest -m benchmark tests/benchmark
+
+The template checks run with the unit tests. Template sizes and resource
+counts may grow by SIZE_TOLERANCE and RESOURCE_TOLERANCE before they fail.
+The timing checks are marked `benchmark` and only run with `-m benchmark`,
+since wall-clock time depends on the machine. They are flagged when they
+exceed the baseline by more than ODIN_BENCHMARK_TIME_TOLERANCE (default 3x,
+at least one second).
+Everything runs offline against the lookups cached in cdk.context.json.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aws_cdk
+import pytest
+
+from odin_infrastructure.odin_api_stack import OdinAPIStack
+from odin_infrastructure.odin_data_stack import OdinDataStack
+from odin_infrastructure.odin_edge_stack import OdinEdgeStack
+from odin_infrastructure.odin_network_stack import OdinNetworkStack
+from tests.unit.stacks import ENV, make_stacks
+
+ROOT = Path(__file__).parents[2]
+BASELINE = Path(__file__).with_name("baseline.json")
+UPDATE = os.environ.get("ODIN_BENCHMARK_UPDATE") == "1"
+TIME_TOLERANCE = float(os.environ.get("ODIN_BENCHMARK_TIME_TOLERANCE", "3"))
+SIZE_TOLERANCE = 1.05
+RESOURCE_TOLERANCE = 1.1
+STACKS = ("OdinNetworkStack", "OdinDataStack", "OdinAPIStack", "OdinEdgeStack")
+
+
+def cdk_context() -> dict:
+    context = json.loads((ROOT / "cdk.json").read_text())["context"]
+    context.update(json.loads((ROOT / "cdk.context.json").read_text()))
+    return context
+
+
+def load_baseline() -> dict:
+    return json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+
+
+def record(key: str, measured: dict) -> None:
+    baseline = load_baseline()
+    baseline.setdefault(key, {}).update(measured)
+    BASELINE.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+def check(key: str, measured: dict) -> None:
+    if UPDATE:
+        record(key, measured)
+        return
+    expected = load_baseline().get(key, {})
+    missing = measured.keys() - expected.keys()
+    if missing:
+        pytest.fail(
+            f"No baseline for {key} {sorted(missing)}, run with ODIN_BENCHMARK_UPDATE=1"
+        )
+    regressions = []
+    for name, value in measured.items():
+        if name.endswith("_seconds"):
+            limit = max(expected[name] * TIME_TOLERANCE, expected[name] + 1)
+        elif name.endswith("_bytes"):
+            limit = expected[name] * SIZE_TOLERANCE
+        else:
+            limit = expected[name] * RESOURCE_TOLERANCE
+        if value > limit:
+            regressions.append(f"{name}: {value} > {limit} (baseline {expected[name]})")
+    assert not regressions, f"{key} regressed:\n" + "\n".join(regressions)
+
+
+def timed_subprocess(args: list[str], env: dict[str, str] | None = None) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        args,
+        cwd=ROOT,
+        env={**os.environ, **(env or {})},
+        check=True,
+        capture_output=True,
+    )
+    return time.perf_counter() - start
+
+
+def instantiate_stacks(app: aws_cdk.App) -> dict[str, float]:
+    """Seconds each stack of app.py takes to construct on its own.
+
+    Stacks are built in dependency order, so the stacks one takes already
+    exist when its timer starts.
+    """
+    seconds: dict[str, float] = {}
+
+    def timed(build):
+        start = time.perf_counter()
+        stack = build()
+        seconds[stack.stack_name] = round(time.perf_counter() - start, 2)
+        return stack
+
+    network = timed(lambda: OdinNetworkStack(app, "OdinNetworkStack", env=ENV))
+    data = timed(lambda: OdinDataStack(app, "OdinDataStack", network, env=ENV))
+    api = timed(lambda: OdinAPIStack(app, "OdinAPIStack", network, data, env=ENV))
+    timed(lambda: OdinEdgeStack(app, "OdinEdgeStack", api, env=ENV))
+    return seconds
+
+
+@pytest.mark.benchmark
+def test_cold_import():
+    seconds = timed_subprocess([sys.executable, "-c", "import aws_cdk"])
+    check("cold_import", {"import_seconds": round(seconds, 2)})
+
+
+@pytest.mark.benchmark
+def test_cold_synth(tmp_path: Path):
+    seconds = timed_subprocess(
+        [sys.executable, "app.py"],
+        env={
+            "CDK_OUTDIR": str(tmp_path),
+            "CDK_CONTEXT_JSON": json.dumps(cdk_context()),
+        },
+    )
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    # Lookups missing from cdk.context.json would need AWS credentials.
+    assert not manifest.get("missing"), manifest["missing"]
+    stacks = [
+        artifact
+        for artifact in manifest["artifacts"].values()
+        if artifact["type"] == "aws:cloudformation:stack"
+    ]
+    check(
+        "cold_synth",
+        {"synth_seconds": round(seconds, 2), "stacks": len(stacks)},
+    )
+
+
+@pytest.mark.benchmark
+def test_stack_instantiate():
+    app = aws_cdk.App(context=cdk_context())
+    seconds = instantiate_stacks(app)
+    for name in STACKS:
+        check(name, {"instantiate_seconds": seconds[name]})
+
+    # Synthesis covers the whole app, the stacks cannot be synthesized alone.
+    start = time.perf_counter()
+    app.synth()
+    check("app_synth", {"synth_seconds": round(time.perf_counter() - start, 2)})
+
+
+@pytest.mark.parametrize("name", STACKS)
+def test_stack_template(name: str):
+    app = aws_cdk.App(context=cdk_context())
+    make_stacks(app)
+    template = app.synth().get_stack_by_name(name).template
+    check(
+        name,
+        {
+            "template_bytes": len(json.dumps(template)),
+            "resources": len(template["Resources"]),
+        },
+    )
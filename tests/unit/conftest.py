@@ -0,0 +1,10 @@
+import aws_cdk.assertions as assertions
+import pytest
+
+from tests.unit.stacks import make_template
+
+
+@pytest.fixture(scope="session")
+def template() -> assertions.Template:
+    """The merged template of the default app, synthesized once."""
+    return make_template()
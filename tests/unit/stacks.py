@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+
+import aws_cdk
+import aws_cdk.assertions as assertions
+
+from odin_infrastructure.config import ODIN_AWS_ACCOUNT, ODIN_AWS_REGION
+from odin_infrastructure.odin_api_stack import OdinAPIStack
+from odin_infrastructure.odin_data_stack import OdinDataStack
+from odin_infrastructure.odin_edge_stack import OdinEdgeStack
+from odin_infrastructure.odin_network_stack import OdinNetworkStack
+
+ENV = aws_cdk.Environment(account=ODIN_AWS_ACCOUNT, region=ODIN_AWS_REGION)
+NETWORK_SETTINGS = {"sizing", "interface_endpoints"}
+DATA_SETTINGS = {
+    "sizing",
+    "architecture",
+    "cache",
+    "mongo_replica_set",
+    "mongo_storage",
+    "mongo_config",
+    "data_cache",
+}
+# Everything else goes to the API stack.
+SHARED_SETTINGS = {"sizing", "architecture"}
+
+
+@dataclass(frozen=True)
+class OdinStacks:
+    network: OdinNetworkStack
+    data: OdinDataStack
+    api: OdinAPIStack
+    edge: OdinEdgeStack
+
+    def all(self) -> list[aws_cdk.Stack]:
+        return [self.network, self.data, self.api, self.edge]
+
+
+def make_stacks(
+    app: aws_cdk.App | None = None, context: dict | None = None, **settings
+) -> OdinStacks:
+    """The stacks of app.py, each given the `settings` it takes."""
+    if app is None:
+        app = aws_cdk.App(context=context)
+
+    def pick(names: set[str]) -> dict:
+        return {key: value for key, value in settings.items() if key in names}
+
+    network = OdinNetworkStack(
+        app, "OdinNetworkStack", env=ENV, **pick(NETWORK_SETTINGS)
+    )
+    data = OdinDataStack(app, "OdinDataStack", network, env=ENV, **pick(DATA_SETTINGS))
+    api = OdinAPIStack(
+        app,
+        "OdinAPIStack",
+        network,
+        data,
+        env=ENV,
+        **pick(settings.keys() - (NETWORK_SETTINGS | DATA_SETTINGS) | SHARED_SETTINGS),
+    )
+    edge = OdinEdgeStack(app, "OdinEdgeStack", api, env=ENV)
+    return OdinStacks(network, data, api, edge)
+
+
+def merged_template(stacks: OdinStacks) -> assertions.Template:
+    """All resources of the app in one template, logical IDs are unique."""
+    resources: dict = {}
+    for stack in stacks.all():
+        template = assertions.Template.from_stack(stack).to_json()
+        duplicates = resources.keys() & template["Resources"].keys()
+        assert not duplicates, duplicates
+        resources.update(template["Resources"])
+    return assertions.Template.from_json({"Resources": resources})
+
+
+def make_template(context: dict | None = None, **settings) -> assertions.Template:
+    """The merged template of the stacks of app.py built with `settings`."""
+    return merged_template(make_stacks(context=context, **settings))
@@ -0,0 +1,484 @@
+import dataclasses
+import json
+import re
+
+import aws_cdk
+import aws_cdk.assertions as assertions
+import pytest
+from aws_cdk import aws_applicationautoscaling as appscaling
+
+from odin_infrastructure.config import ODIN_DATA_BUCKETS
+from odin_infrastructure.log_routing import (
+    FLUENT_BIT_CONFIG,
+    FireLensSettings,
+    LogSettings,
+)
+from odin_infrastructure.mongo import ReplicaSetSettings
+from odin_infrastructure.odin_cluster import (
+    ApiDelivery,
+    MetricScaling,
+    PgBouncerSettings,
+    RolloutProfile,
+    ScheduledCapacity,
+    ServiceConnectSettings,
+    ServiceScaling,
+)
+from odin_infrastructure.odin_worker import WorkerSettings
+from odin_infrastructure.scheduled_tasks import MaintenanceSettings
+from odin_infrastructure.sizing import SIZING_PROFILES
+from tests.unit.stacks import make_template
+
+
+def test_latency_scaling(template: assertions.Template):
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {"PolicyType": "StepScaling"},
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {
+            "MetricName": "TargetResponseTime",
+            "ExtendedStatistic": "p99",
+            "Threshold": 3,
+        },
+    )
+    # Scale-in is left to target tracking, so there is no low-latency alarm.
+    template.resource_properties_count_is(
+        "AWS::CloudWatch::Alarm",
+        {
+            "MetricName": "TargetResponseTime",
+            "ComparisonOperator": "LessThanOrEqualToThreshold",
+        },
+        0,
+    )
+
+
+def test_scaling_per_environment():
+    template = make_template(
+        sizing=dataclasses.replace(
+            SIZING_PROFILES["prod"], api_min_capacity=2, api_max_capacity=30
+        ),
+        api_scaling=ServiceScaling(
+            latency=None,
+            metrics=(
+                MetricScaling(
+                    id="QueueScaling",
+                    namespace="Odin/API",
+                    metric_name="InFlightRequests",
+                    target_value=8,
+                ),
+            ),
+            schedules=(
+                ScheduledCapacity(
+                    id="CampaignStart",
+                    schedule=appscaling.Schedule.cron(hour="6", minute="0"),
+                    min_capacity=6,
+                ),
+            ),
+        ),
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalableTarget",
+        {
+            "MinCapacity": 2,
+            "MaxCapacity": 30,
+            "ScheduledActions": [
+                assertions.Match.object_like(
+                    {
+                        "ScheduledActionName": "CampaignStart",
+                        "ScalableTargetAction": {"MinCapacity": 6},
+                    }
+                )
+            ],
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "TargetTrackingScalingPolicyConfiguration": assertions.Match.object_like(
+                {
+                    "TargetValue": 8,
+                    "CustomizedMetricSpecification": assertions.Match.object_like(
+                        {"MetricName": "InFlightRequests"}
+                    ),
+                }
+            )
+        },
+    )
+    template.resource_properties_count_is(
+        "AWS::ApplicationAutoScaling::ScalingPolicy", {"PolicyType": "StepScaling"}, 0
+    )
+
+
+def test_worker_service():
+    template = make_template(worker=WorkerSettings(on_demand_base=1))
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "ServiceName": "OdinQsmrWorkerService",
+            "CapacityProviderStrategy": [
+                {"CapacityProvider": "FARGATE", "Base": 1, "Weight": 1},
+                {"CapacityProvider": "FARGATE_SPOT", "Weight": 3},
+            ],
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::ClusterCapacityProviderAssociations",
+        {"CapacityProviders": ["FARGATE", "FARGATE_SPOT"]},
+    )
+    template.has_resource_properties("AWS::SQS::Queue", {"QueueName": "odin-qsmr-jobs"})
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {"MetricName": "ApproximateAgeOfOldestMessage", "Threshold": 900},
+    )
+    worker_policies = template.find_resources(
+        "AWS::IAM::Policy",
+        {
+            "Properties": {
+                "PolicyName": assertions.Match.string_like_regexp(
+                    "OdinWorkerTaskDefinitionTaskRole"
+                )
+            }
+        },
+    )
+    (policy,) = worker_policies.values()
+    actions = [
+        statement["Action"]
+        for statement in policy["Properties"]["PolicyDocument"]["Statement"]
+    ]
+    assert actions.count(["s3:GetObject*", "s3:GetBucket*", "s3:List*"]) == len(
+        ODIN_DATA_BUCKETS
+    )
+
+
+def test_https_delivery():
+    template = make_template(api_delivery=ApiDelivery())
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::Listener", {"Protocol": "HTTPS", "Port": 443}
+    )
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::TargetGroup",
+        {"Protocol": "HTTP", "ProtocolVersion": "HTTP2"},
+    )
+    template.has_resource_properties(
+        "AWS::CertificateManager::Certificate", {"DomainName": "api.odin-smr.org"}
+    )
+    template.has_resource_properties(
+        "AWS::Route53::RecordSet", {"Name": "api.odin-smr.org.", "Type": "A"}
+    )
+    distribution = template.find_resources("AWS::CloudFront::Distribution")
+    (config,) = [d["Properties"]["DistributionConfig"] for d in distribution.values()]
+    assert config["HttpVersion"] == "http2and3"
+    api_origins = [o for o in config["Origins"] if "CustomOriginConfig" in o]
+    assert len(api_origins) == 2
+    for origin in api_origins:
+        assert origin["DomainName"] == "api.odin-smr.org"
+        assert origin["CustomOriginConfig"]["OriginProtocolPolicy"] == "https-only"
+        assert origin["CustomOriginConfig"]["OriginKeepaliveTimeout"] == 60
+        assert origin["CustomOriginConfig"]["OriginReadTimeout"] == 60
+    assert all(b["Compress"] for b in config["CacheBehaviors"])
+
+
+def test_fast_rollout(template: assertions.Template):
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::TargetGroup",
+        {
+            "HealthCheckIntervalSeconds": 10,
+            "HealthCheckTimeoutSeconds": 5,
+            "UnhealthyThresholdCount": 2,
+            "TargetGroupAttributes": assertions.Match.array_with(
+                [
+                    {"Key": "deregistration_delay.timeout_seconds", "Value": "30"},
+                    {
+                        "Key": "load_balancing.algorithm.type",
+                        "Value": "least_outstanding_requests",
+                    },
+                ]
+            ),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "ServiceName": "OdinFargateService",
+            "DeploymentConfiguration": {
+                "DeploymentCircuitBreaker": {"Enable": True, "Rollback": True},
+                "MinimumHealthyPercent": 100,
+                "MaximumPercent": 200,
+            },
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "HealthCheck": assertions.Match.object_like(
+                            {"Interval": 15, "Retries": 3, "StartPeriod": 60}
+                        )
+                    }
+                )
+            ]
+        },
+    )
+
+
+def test_rollout_profile_is_validated():
+    with pytest.raises(ValueError):
+        RolloutProfile(health_check_timeout=aws_cdk.Duration.seconds(10))
+    with pytest.raises(ValueError):
+        RolloutProfile(unhealthy_threshold=1)
+    with pytest.raises(ValueError):
+        RolloutProfile(
+            least_outstanding_requests=False,
+            slow_start=aws_cdk.Duration.seconds(10),
+        )
+    with pytest.raises(ValueError):
+        RolloutProfile(slow_start=aws_cdk.Duration.seconds(60))
+
+
+def target_group_attributes(template: assertions.Template) -> dict[str, str]:
+    (target_group,) = template.find_resources(
+        "AWS::ElasticLoadBalancingV2::TargetGroup"
+    ).values()
+    return {
+        attribute["Key"]: attribute["Value"]
+        for attribute in target_group["Properties"]["TargetGroupAttributes"]
+    }
+
+
+def test_default_target_group_attributes(template: assertions.Template):
+    assert target_group_attributes(template) == {
+        "stickiness.enabled": "false",
+        "deregistration_delay.timeout_seconds": "30",
+        "load_balancing.algorithm.type": "least_outstanding_requests",
+    }
+
+
+def test_opt_in_slow_start():
+    template = make_template(
+        api_rollout=RolloutProfile(
+            least_outstanding_requests=False,
+            slow_start=aws_cdk.Duration.seconds(60),
+        )
+    )
+    attributes = target_group_attributes(template)
+    assert attributes["slow_start.duration_seconds"] == "60"
+    assert "load_balancing.algorithm.type" not in attributes
+
+
+def test_pgbouncer_sidecar():
+    template = make_template(api_pgbouncer=PgBouncerSettings(pool_size=10))
+    task = template.find_resources(
+        "AWS::ECS::TaskDefinition",
+        {"Properties": {"Family": assertions.Match.string_like_regexp("OdinAPI")}},
+    )
+    (properties,) = [t["Properties"] for t in task.values()]
+    api, pgbouncer = properties["ContainerDefinitions"]
+
+    def env(container: dict) -> dict:
+        return {e["Name"]: e["Value"] for e in container["Environment"]}
+
+    assert env(api)["PGHOST"] == "127.0.0.1"
+    assert api["DependsOn"] == [
+        {"ContainerName": pgbouncer["Name"], "Condition": "HEALTHY"}
+    ]
+    assert "pg_isready -h 127.0.0.1" in pgbouncer["HealthCheck"]["Command"][1]
+    assert env(pgbouncer)["POOL_MODE"] == "transaction"
+    assert env(pgbouncer)["DEFAULT_POOL_SIZE"] == "10"
+    # The real host from SSM now only goes to the sidecar.
+    assert "Ref" in env(pgbouncer)["DB_HOST"]
+    with pytest.raises(ValueError):
+        PgBouncerSettings(pool_mode="connection")
+
+
+def test_non_blocking_logs(template: assertions.Template):
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "LogConfiguration": {
+                            "LogDriver": "awslogs",
+                            "Options": assertions.Match.object_like(
+                                {"mode": "non-blocking", "max-buffer-size": "26214400b"}
+                            ),
+                        }
+                    }
+                )
+            ]
+        },
+    )
+
+
+def test_firelens_log_router():
+    template = make_template(api_logging=LogSettings(firelens=FireLensSettings()))
+    task = template.find_resources(
+        "AWS::ECS::TaskDefinition",
+        {"Properties": {"Family": assertions.Match.string_like_regexp("OdinAPI")}},
+    )
+    (properties,) = [t["Properties"] for t in task.values()]
+    api, router = properties["ContainerDefinitions"]
+    assert api["LogConfiguration"]["LogDriver"] == "awsfirelens"
+    assert router["FirelensConfiguration"]["Type"] == "fluentbit"
+    assert router["LogConfiguration"]["Options"]["mode"] == "non-blocking"
+    environment = {e["Name"]: e["Value"] for e in router["Environment"]}
+    assert "aws_fluent_bit_init_s3_1" in environment
+    assert environment["ODIN_METRICS_NAMESPACE"] == "Odin/API"
+    # The json parser of the parser filter comes from the image's parsers file.
+    config = FLUENT_BIT_CONFIG.read_text()
+    assert "Parser       json" in config
+    assert re.search(
+        r"^\[SERVICE\]\n\s+Parsers_File\s+/fluent-bit/parsers/parsers.conf$",
+        config,
+        re.MULTILINE,
+    )
+    # The init container fetches the config through the S3 endpoint, which
+    # already allows every asset, so the network stack does not change.
+    assert json.dumps(template.find_resources("AWS::EC2::VPCEndpoint")) == json.dumps(
+        make_template().find_resources("AWS::EC2::VPCEndpoint")
+    )
+
+
+def test_maintenance_tasks():
+    template = make_template(
+        mongo_replica_set=ReplicaSetSettings(),
+        maintenance=MaintenanceSettings(
+            collection_stats=None, rebuild_indexes=("L2.L2_freqmode_1",)
+        ),
+    )
+    rules = template.find_resources("AWS::Events::Rule")
+    assert len(rules) == 2
+    (schedule,) = [
+        r["Properties"]["ScheduleExpression"]
+        for r in rules.values()
+        if "ScheduleExpression" in r["Properties"]
+    ]
+    assert schedule == "cron(0 2 ? * SUN *)"
+    template.has_resource_properties(
+        "AWS::Events::Rule",
+        {
+            "EventPattern": {
+                "source": ["aws.ecs"],
+                "detail-type": ["ECS Deployment State Change"],
+                "detail": {"eventName": ["SERVICE_DEPLOYMENT_COMPLETED"]},
+                "resources": [{"Ref": assertions.Match.any_value()}],
+            },
+            "Targets": [
+                assertions.Match.object_like(
+                    {
+                        "EcsParameters": assertions.Match.object_like(
+                            {"LaunchType": "FARGATE"}
+                        ),
+                        "RetryPolicy": assertions.Match.object_like(
+                            {"MaximumEventAgeInSeconds": 7200}
+                        ),
+                    }
+                )
+            ],
+        },
+    )
+    tasks = template.find_resources(
+        "AWS::ECS::TaskDefinition",
+        {"Properties": {"Family": "OdinMongoIndexMaintenance"}},
+    )
+    ((container,),) = [t["Properties"]["ContainerDefinitions"] for t in tasks.values()]
+    environment = {e["Name"]: e["Value"] for e in container["Environment"]}
+    assert environment["MONGO_HOSTS"] == (
+        "mongo2.odin:27017,mongo1.odin:27017,mongo0.odin:27017"
+    )
+    assert "compact" in environment["ODIN_SCRIPT"]
+    assert environment["MIN_INDEX_AGE_DAYS"] == "30"
+    assert environment["REBUILD_INDEXES"] == "L2.L2_freqmode_1"
+    template.has_resource_properties(
+        "AWS::Logs::MetricFilter",
+        {
+            "MetricTransformations": [
+                assertions.Match.object_like(
+                    {"MetricName": "UnusedIndexes", "MetricNamespace": "Odin/Mongo"}
+                )
+            ]
+        },
+    )
+
+
+def test_maintenance_settings_are_validated():
+    with pytest.raises(ValueError):
+        MaintenanceSettings(rebuild_indexes=("L2",))
+    with pytest.raises(ValueError):
+        MaintenanceSettings(rebuild_indexes=("L2._id_",))
+
+
+def test_service_connect():
+    template = make_template(
+        api_service_connect=ServiceConnectSettings(),
+        worker=WorkerSettings(),
+    )
+    template.has_resource_properties(
+        "AWS::ServiceDiscovery::HttpNamespace", {"Name": "odin.internal"}
+    )
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "ServiceName": "OdinFargateService",
+            "ServiceConnectConfiguration": assertions.Match.object_like(
+                {
+                    "Enabled": True,
+                    "Services": [
+                        {
+                            "PortName": "odinapi",
+                            "ClientAliases": [{"DnsName": "odin-api", "Port": 8000}],
+                            "Timeout": {
+                                "IdleTimeoutSeconds": 360,
+                                "PerRequestTimeoutSeconds": 300,
+                            },
+                        }
+                    ],
+                }
+            ),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "ServiceName": "OdinQsmrWorkerService",
+            "ServiceConnectConfiguration": assertions.Match.object_like(
+                {"Enabled": True}
+            ),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": assertions.Match.array_with(
+                [
+                    assertions.Match.object_like(
+                        {
+                            "Environment": assertions.Match.array_with(
+                                [
+                                    {
+                                        "Name": "ODIN_API_ROOT",
+                                        "Value": "http://odin-api:8000",
+                                    }
+                                ]
+                            )
+                        }
+                    )
+                ]
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::EC2::SecurityGroupIngress",
+        {
+            "FromPort": 8000,
+            "SourceSecurityGroupId": {
+                "Fn::GetAtt": [
+                    assertions.Match.string_like_regexp("OdinWorkerService"),
+                    "GroupId",
+                ]
+            },
+        },
+    )
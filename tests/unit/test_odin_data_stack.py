@@ -0,0 +1,302 @@
+import dataclasses
+import json
+
+import aws_cdk.assertions as assertions
+import pytest
+from aws_cdk import aws_ec2 as ec2
+
+from odin_infrastructure.cache import CacheSettings
+from odin_infrastructure.data_cache import DataCacheSettings
+from odin_infrastructure.mongo import (
+    MongodConfig,
+    MongoStorageProfile,
+    ReplicaSetSettings,
+)
+from odin_infrastructure.sizing import SIZING_PROFILES
+from tests.unit.stacks import make_template
+
+
+def test_optional_cache():
+    template = make_template(cache=CacheSettings(num_shards=2, replicas_per_shard=1))
+    template.has_resource_properties(
+        "AWS::ElastiCache::ReplicationGroup",
+        {
+            "Engine": "valkey",
+            "ClusterMode": "enabled",
+            "NumNodeGroups": 2,
+            "CacheParameterGroupName": "default.valkey8.cluster.on",
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Route53::RecordSet", {"Name": "cache.odin.", "Type": "CNAME"}
+    )
+    template.has_resource_properties(
+        "AWS::EC2::SecurityGroupIngress",
+        {
+            "FromPort": 6379,
+            "SourceSecurityGroupId": assertions.Match.any_value(),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Environment": assertions.Match.array_with(
+                            [{"Name": "ODINAPI_CACHE_CLUSTER", "Value": "1"}]
+                        )
+                    }
+                )
+            ]
+        },
+    )
+
+
+def test_cache_disabled_by_default(template: assertions.Template):
+    template.resource_count_is("AWS::ElastiCache::ReplicationGroup", 0)
+
+
+def test_mongo_replica_set():
+    template = make_template(
+        mongo_replica_set=ReplicaSetSettings(members=3, read_preference="nearest")
+    )
+    for name in ("OdinMongo", "OdinMongo1", "OdinMongo2"):
+        template.has_resource_properties(
+            "AWS::EC2::Instance", {"Tags": [{"Key": "Name", "Value": name}]}
+        )
+    for index in range(3):
+        template.has_resource_properties(
+            "AWS::Route53::RecordSet", {"Name": f"mongo{index}.odin.", "Type": "A"}
+        )
+    template.resource_count_is("AWS::SecretsManager::Secret", 1)
+    # User data only runs on the first boot, so the running member 0 gets
+    # the replica set configuration through SSM, after the other members.
+    associations = {
+        name: association
+        for name, association in template.find_resources(
+            "AWS::SSM::Association"
+        ).items()
+        if name.startswith("OdinMongo")
+    }
+    assert len(associations) == 3
+    member0 = associations["OdinMongoConfiguration"]
+    commands = json.dumps(member0["Properties"]["Parameters"]["commands"])
+    assert "replSetName" in commands
+    assert "grep -qx RS_OK && break" in commands
+    assert "OdinMongo2Configuration" in member0["DependsOn"]
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Environment": assertions.Match.array_with(
+                            [
+                                {
+                                    "Name": "ODINAPI_MONGODB_HOST",
+                                    "Value": "mongodb://mongo0.odin:27017,"
+                                    "mongo1.odin:27017,mongo2.odin:27017/"
+                                    "?replicaSet=odin&readPreference=nearest",
+                                }
+                            ]
+                        )
+                    }
+                )
+            ]
+        },
+    )
+
+
+def test_replica_set_settings_are_validated():
+    with pytest.raises(ValueError):
+        ReplicaSetSettings(read_preference="fastest")
+
+
+def test_mongo_volume_alarms(template: assertions.Template):
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {"Namespace": "AWS/EBS", "MetricName": "VolumeQueueLength"},
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {"Namespace": "AWS/EBS", "MetricName": "BurstBalance"},
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm", {"MetricName": "CPUCreditBalance"}
+    )
+    template.resource_count_is("Custom::AWS", 0)
+
+
+def test_mongo_storage_profile():
+    template = make_template(
+        sizing=dataclasses.replace(
+            SIZING_PROFILES["prod"], mongo_instance_type="r6i.large"
+        ),
+        mongo_storage=MongoStorageProfile(
+            volume_type=ec2.EbsDeviceVolumeType.GP3,
+            iops=6000,
+            throughput_mibps=500,
+        ),
+    )
+    template.has_resource_properties(
+        "AWS::EC2::Instance",
+        {
+            "InstanceType": "r6i.large",
+            "Tags": [{"Key": "Name", "Value": "OdinMongo"}],
+        },
+    )
+    template.has_resource_properties(
+        "Custom::AWS",
+        {
+            "Create": assertions.Match.serialized_json(
+                assertions.Match.object_like(
+                    {
+                        "action": "modifyVolume",
+                        "parameters": {
+                            "VolumeId": assertions.Match.any_value(),
+                            "VolumeType": "gp3",
+                            "Iops": 6000,
+                            "Throughput": 500,
+                        },
+                    }
+                )
+            )
+        },
+    )
+    alarms = template.find_resources(
+        "AWS::CloudWatch::Alarm", {"Properties": {"MetricName": "CPUCreditBalance"}}
+    )
+    assert not alarms
+
+
+def test_mongo_storage_profile_is_validated():
+    with pytest.raises(ValueError):
+        MongoStorageProfile(volume_type=ec2.EbsDeviceVolumeType.IO2)
+    with pytest.raises(ValueError):
+        MongoStorageProfile(
+            volume_type=ec2.EbsDeviceVolumeType.IO2, iops=10000, throughput_mibps=500
+        )
+
+
+def test_mongod_conf(template: assertions.Template):
+    mongo = template.find_resources(
+        "AWS::EC2::Instance",
+        {"Properties": {"Tags": [{"Key": "Name", "Value": "OdinMongo"}]}},
+    )
+    (properties,) = [m["Properties"] for m in mongo.values()]
+    user_data = json.dumps(properties["UserData"])
+    assert "cacheSizeGB: 3.5" in user_data
+    assert 'blockCompressor: \\"zstd\\"' in user_data
+    assert "slowOpThresholdMs: 100" in user_data
+    assert "/etc/udev/rules.d/60-odin-mongo-readahead.rules" in user_data
+    # mongod.conf is rendered, not patched.
+    assert "/var/lib/mongo" not in user_data
+    # The running host only gets the tuning through its SSM association.
+    (association,) = template.find_resources(
+        "AWS::SSM::Association",
+        {"Properties": {"AssociationName": "OdinMongoConfiguration"}},
+    ).values()
+    commands = json.dumps(association["Properties"]["Parameters"]["commands"])
+    assert "cacheSizeGB: 3.5" in commands
+    assert "slowOpThresholdMs: 100" in commands
+    assert "service mongod restart" in commands
+    assert "mount -o remount,noatime /data/mongodb" in commands
+    assert "/etc/udev/rules.d/60-odin-mongo-readahead.rules" in commands
+
+    template.has_resource_properties(
+        "AWS::Logs::MetricFilter",
+        {
+            "FilterPattern": '{ $.msg = "Slow query" }',
+            "MetricTransformations": [
+                {
+                    "MetricNamespace": "Odin/Mongo",
+                    "MetricName": "SlowQueries",
+                    "MetricValue": "1",
+                    "Dimensions": [{"Key": "Collection", "Value": "$.attr.ns"}],
+                }
+            ],
+        },
+    )
+
+
+def test_mongod_config_follows_instance_type():
+    template = make_template(
+        sizing=dataclasses.replace(
+            SIZING_PROFILES["prod"], mongo_instance_type="r6i.xlarge"
+        ),
+        mongo_config=MongodConfig(cache_memory_fraction=0.6),
+    )
+    assert "cacheSizeGB: 18.6" in json.dumps(template.to_json())
+    with pytest.raises(ValueError):
+        MongodConfig(block_compressor="lz4")
+    with pytest.raises(ValueError):
+        MongodConfig(cache_memory_fraction=0.9)
+
+
+def test_data_cache():
+    template = make_template(
+        data_cache=DataCacheSettings(sources=("odin-era5", "odin-zpt/2024"))
+    )
+    template.has_resource_properties(
+        "AWS::EFS::FileSystem", {"ThroughputMode": "elastic", "Encrypted": True}
+    )
+    template.resource_count_is("AWS::EFS::AccessPoint", 1)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "Family": assertions.Match.string_like_regexp("OdinAPI"),
+            "Volumes": [
+                {
+                    "Name": "odin-data",
+                    "EFSVolumeConfiguration": assertions.Match.object_like(
+                        {"TransitEncryption": "ENABLED"}
+                    ),
+                }
+            ],
+            "ContainerDefinitions": assertions.Match.array_with(
+                [
+                    assertions.Match.object_like(
+                        {
+                            "MountPoints": [
+                                {
+                                    "ContainerPath": "/mnt/odin-data",
+                                    "ReadOnly": True,
+                                    "SourceVolume": "odin-data",
+                                }
+                            ],
+                            "Environment": assertions.Match.array_with(
+                                [
+                                    {
+                                        "Name": "ODINAPI_DATA_CACHE",
+                                        "Value": "/mnt/odin-data",
+                                    }
+                                ]
+                            ),
+                        }
+                    )
+                ]
+            ),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "Family": "OdinDataCachePopulate",
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Command": [
+                            "aws s3 sync --only-show-errors s3://odin-era5"
+                            " /mnt/odin-data/odin-era5"
+                            " && aws s3 sync --only-show-errors s3://odin-zpt/2024"
+                            " /mnt/odin-data/odin-zpt/2024"
+                        ]
+                    }
+                )
+            ],
+        },
+    )
+    template.has_resource_properties(
+        "AWS::EC2::SecurityGroupIngress", {"FromPort": 2049, "ToPort": 2049}
+    )
@@ -0,0 +1,113 @@
+import json
+
+import aws_cdk.assertions as assertions
+import pytest
+
+from odin_infrastructure.config import ODIN_AWS_REGION
+from odin_infrastructure.odin_worker import WorkerSettings
+from odin_infrastructure.result_store import ResultStoreSettings
+from tests.unit.stacks import make_template
+
+
+def test_api_cache_behaviors(template: assertions.Template):
+    template.resource_count_is("AWS::CloudFront::CachePolicy", 5)
+    template.has_resource_properties(
+        "AWS::CloudFront::CachePolicy",
+        {
+            "CachePolicyConfig": {
+                "MinTTL": 0,
+                "DefaultTTL": 86400,
+                "ParametersInCacheKeyAndForwardedToOrigin": {
+                    "QueryStringsConfig": {"QueryStringBehavior": "all"},
+                    "EnableAcceptEncodingGzip": True,
+                },
+            }
+        },
+    )
+    distribution = template.find_resources("AWS::CloudFront::Distribution")
+    (config,) = [r["Properties"]["DistributionConfig"] for r in distribution.values()]
+    behaviors = config["CacheBehaviors"]
+    assert [b["PathPattern"] for b in behaviors][-1] == "/rest_api/*"
+    assert behaviors[-1]["CachePolicyId"] == "4135ea2d-6df8-44a3-9df3-4b5a84be39ad"
+    shielded = [o for o in config["Origins"] if "OriginShield" in o]
+    assert len(shielded) == 1
+    assert shielded[0]["OriginShield"]["OriginShieldRegion"] == ODIN_AWS_REGION
+
+
+def test_result_store():
+    template = make_template(
+        result_store=ResultStoreSettings(), worker=WorkerSettings()
+    )
+    template.has_resource_properties(
+        "AWS::S3::Bucket", {"BucketName": "odin-smr-results"}
+    )
+    distribution = template.find_resources("AWS::CloudFront::Distribution")
+    (config,) = [d["Properties"]["DistributionConfig"] for d in distribution.values()]
+    (group,) = config["OriginGroups"]["Items"]
+    assert group["FailoverCriteria"]["StatusCodes"]["Items"] == [403, 404]
+    behaviors = {b["PathPattern"]: b for b in config["CacheBehaviors"]}
+    for path in ("/rest_api/*/level2/*", "/rest_api/*/vds/*"):
+        assert behaviors[path]["TargetOriginId"] == group["Id"]
+        assert behaviors[path]["FunctionAssociations"][0]["EventType"] == (
+            "viewer-request"
+        )
+    assert behaviors["/rest_api/*/level1/*"]["TargetOriginId"] != group["Id"]
+    # S3 is the primary, the cached API origin the fallback.
+    primary, fallback = [m["OriginId"] for m in group["Members"]["Items"]]
+    assert fallback == behaviors["/rest_api/*/level1/*"]["TargetOriginId"]
+    origins = {o["Id"]: o for o in config["Origins"]}
+    assert "S3OriginConfig" in origins[primary]
+
+    writers = [
+        policy
+        for policy in template.find_resources("AWS::IAM::Policy").values()
+        if "s3:PutObject" in json.dumps(policy["Properties"]["PolicyDocument"])
+        and "odin-smr-results" in json.dumps(policy["Properties"]["PolicyDocument"])
+    ]
+    assert len(writers) == 2
+    template.has_resource_properties(
+        "AWS::EC2::VPCEndpoint",
+        {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {
+                                "Action": ["s3:GetObject", "s3:PutObject"],
+                                "Resource": assertions.Match.array_with(
+                                    ["arn:aws:s3:::odin-smr-results/*"]
+                                ),
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "Family": assertions.Match.string_like_regexp("OdinAPI"),
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Environment": assertions.Match.array_with(
+                            [
+                                {
+                                    "Name": "ODINAPI_RESULTS_BUCKET",
+                                    "Value": "odin-smr-results",
+                                }
+                            ]
+                        )
+                    }
+                )
+            ],
+        },
+    )
+
+
+def test_result_store_needs_cache_rules():
+    with pytest.raises(ValueError):
+        make_template(
+            result_store=ResultStoreSettings(path_patterns=("/rest_api/*/l3/*",))
+        )
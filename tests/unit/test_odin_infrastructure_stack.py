@@ -1,18 +1,15 @@
-import aws_cdk
+import dataclasses
+import json
+
 import aws_cdk.assertions as assertions
+import pytest
 
-from odin_infrastructure.odin_api_stack import OdinAPIStack
-from odin_infrastructure.config import ODIN_AWS_ACCOUNT, ODIN_AWS_REGION
+from odin_infrastructure.sizing import SIZING_PROFILES
+from tests.unit.stacks import make_stacks, make_template
 
 
 def test_sqs_queue_created():
-    app = aws_cdk.App()
-    stack = OdinAPIStack(
-        app,
-        "odin-api",
-        env=aws_cdk.Environment(account=ODIN_AWS_ACCOUNT, region=ODIN_AWS_REGION),
-    )
-    template = assertions.Template.from_stack(stack)
+    template = make_template()
 
     template.has_resource_properties(
         "AWS::EC2::Instance", {"Tags": [{"Key": "Name", "Value": "OdinMongo"}]}
@@ -23,3 +20,169 @@ def test_sqs_queue_created():
     template.has_resource_properties(
         "AWS::EC2::VPC", {"Tags": [{"Key": "Name", "Value": "OdinVPC"}]}
     )
+
+
+def test_observability(template: assertions.Template):
+    template.has_resource_properties(
+        "AWS::ECS::Cluster",
+        {
+            "ClusterSettings": [{"Name": "containerInsights", "Value": "enabled"}],
+        },
+    )
+    template.resource_count_is("AWS::CloudWatch::Dashboard", 1)
+    for name in ("OdinMongo", "OdinAdmin"):
+        (instance,) = template.find_resources(
+            "AWS::EC2::Instance",
+            {"Properties": {"Tags": [{"Key": "Name", "Value": name}]}},
+        ).values()
+        user_data = json.dumps(instance["Properties"]["UserData"])
+        assert "amazon-cloudwatch-agent" in user_data
+        assert "yum install -y mongodb-org awslogs" not in user_data
+        # The running hosts get the agent, and lose awslogs, through SSM.
+        (association,) = template.find_resources(
+            "AWS::SSM::Association",
+            {"Properties": {"AssociationName": f"{name}Configuration"}},
+        ).values()
+        commands = json.dumps(association["Properties"]["Parameters"]["commands"])
+        assert "amazon-cloudwatch-agent-ctl -a fetch-config" in commands
+        assert "service awslogs stop" in commands
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {"MetricName": "StatusCheckFailed", "Namespace": "AWS/EC2"},
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {
+            "Metrics": assertions.Match.array_with(
+                [
+                    assertions.Match.object_like(
+                        {
+                            "MetricStat": assertions.Match.object_like(
+                                {
+                                    "Metric": assertions.Match.object_like(
+                                        {
+                                            "Namespace": "Odin/Mongo",
+                                            "MetricName": "GlobalLockQueueReaders",
+                                        }
+                                    )
+                                }
+                            )
+                        }
+                    )
+                ]
+            )
+        },
+    )
+
+
+def test_sizing_profile_from_context():
+    template = make_template(
+        context={
+            "odin:sizing": "reprocessing",
+            "odin:sizing-overrides": json.dumps({"api_max_capacity": 40}),
+        }
+    )
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition", {"Cpu": "4096", "Memory": "8192"}
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalableTarget",
+        {"MinCapacity": 2, "MaxCapacity": 40},
+    )
+    template.has_resource_properties(
+        "AWS::EC2::Instance",
+        {
+            "InstanceType": "r6i.xlarge",
+            "Tags": [{"Key": "Name", "Value": "OdinMongo"}],
+        },
+    )
+    template.has_resource_properties(
+        "AWS::EC2::Instance", {"InstanceType": "c6in.large"}
+    )
+
+
+def test_sizing_profile_is_validated():
+    with pytest.raises(ValueError):
+        dataclasses.replace(SIZING_PROFILES["prod"], api_memory_limit_mib=1024)
+    with pytest.raises(ValueError):
+        dataclasses.replace(SIZING_PROFILES["prod"], api_min_capacity=11)
+    with pytest.raises(ValueError):
+        dataclasses.replace(SIZING_PROFILES["small"], nat_instance_type="t3")
+    with pytest.raises(ValueError):
+        make_template(context={"odin:sizing": "huge"})
+    with pytest.raises(ValueError):
+        make_template(context={"odin:sizing-overrides": {"api_gpus": 1}})
+
+
+def test_graviton_architecture():
+    template = make_template(context={"odin:architecture": "arm64"})
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "Family": assertions.Match.string_like_regexp("OdinAPITaskDefinition"),
+            "RuntimePlatform": {
+                "CpuArchitecture": "ARM64",
+                "OperatingSystemFamily": "LINUX",
+            },
+        },
+    )
+    mongo = template.find_resources(
+        "AWS::EC2::Instance",
+        {"Properties": {"Tags": [{"Key": "Name", "Value": "OdinMongo"}]}},
+    )
+    (properties,) = [m["Properties"] for m in mongo.values()]
+    assert properties["InstanceType"] == "t4g.large"
+    assert "mongodb-org/6.0/aarch64/" in json.dumps(properties["UserData"])
+    template.has_resource_properties(
+        "AWS::EC2::Instance",
+        {
+            "InstanceType": "t4g.nano",
+            "Tags": [{"Key": "Name", "Value": "OdinAdmin"}],
+        },
+    )
+    with pytest.raises(ValueError):
+        make_template(context={"odin:architecture": "riscv64"})
+
+
+def test_stack_split():
+    stacks = make_stacks()
+    templates = {
+        stack.stack_name: assertions.Template.from_stack(stack)
+        for stack in stacks.all()
+    }
+    templates["OdinNetworkStack"].resource_count_is("AWS::EC2::VPC", 1)
+    templates["OdinNetworkStack"].resource_count_is("AWS::EC2::VPCEndpoint", 1)
+    templates["OdinDataStack"].resource_count_is("AWS::EC2::Instance", 2)
+    templates["OdinAPIStack"].resource_count_is("AWS::ECS::Service", 1)
+    templates["OdinEdgeStack"].resource_count_is("AWS::CloudFront::Distribution", 1)
+    for name in ("OdinNetworkStack", "OdinDataStack", "OdinEdgeStack"):
+        templates[name].resource_count_is("AWS::ECS::Service", 0)
+    templates["OdinAPIStack"].resource_count_is("AWS::EC2::Instance", 0)
+    templates["OdinAPIStack"].resource_count_is("AWS::CloudFront::Distribution", 0)
+
+    assert stacks.data.dependencies == [stacks.network]
+    assert set(stacks.api.dependencies) == {stacks.network, stacks.data}
+    assert stacks.edge.dependencies == [stacks.api]
+    # A single Mongo is reached by name, replacing it does not touch the
+    # API stack.
+    templates["OdinAPIStack"].has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": assertions.Match.array_with(
+                [
+                    assertions.Match.object_like(
+                        {
+                            "Environment": assertions.Match.array_with(
+                                [
+                                    {
+                                        "Name": "ODINAPI_MONGODB_HOST",
+                                        "Value": "mongo.odin",
+                                    }
+                                ]
+                            )
+                        }
+                    )
+                ]
+            )
+        },
+    )
@@ -0,0 +1,168 @@
+import aws_cdk
+import aws_cdk.assertions as assertions
+import pytest
+
+from odin_infrastructure.odin_load_test_stack import (
+    LoadTestSettings,
+    OdinLoadTestStack,
+    load_test_from_context,
+)
+from tests.unit.stacks import ENV, OdinStacks, make_stacks
+
+
+def make_stacks_with_load_test(
+    settings: LoadTestSettings,
+) -> tuple[OdinStacks, OdinLoadTestStack]:
+    app = aws_cdk.App()
+    stacks = make_stacks(app)
+    return stacks, OdinLoadTestStack(
+        app,
+        "OdinLoadTestStack",
+        stacks.network,
+        stacks.data,
+        stacks.api,
+        settings=settings,
+        env=ENV,
+    )
+
+
+def make_template(settings: LoadTestSettings) -> assertions.Template:
+    _, stack = make_stacks_with_load_test(settings)
+    return assertions.Template.from_stack(stack)
+
+
+@pytest.fixture(scope="module")
+def template() -> assertions.Template:
+    return make_template(LoadTestSettings(workers=8, users=800, worker_cpu=2048))
+
+
+def container(template: assertions.Template, family: str) -> dict:
+    tasks = template.find_resources(
+        "AWS::ECS::TaskDefinition",
+        {"Properties": {"Family": assertions.Match.string_like_regexp(family)}},
+    )
+    ((definition,),) = [t["Properties"]["ContainerDefinitions"] for t in tasks.values()]
+    return definition
+
+
+def test_services_start_stopped(template: assertions.Template):
+    for name in ("OdinLoadTestMaster", "OdinLoadTestWorkers"):
+        template.has_resource_properties(
+            "AWS::ECS::Service",
+            {
+                "ServiceName": name,
+                "DesiredCount": 0,
+                "LaunchType": "FARGATE",
+                "Cluster": {"Fn::ImportValue": assertions.Match.any_value()},
+            },
+        )
+    template.has_resource_properties(
+        "AWS::ServiceDiscovery::PrivateDnsNamespace", {"Name": "loadtest.odin"}
+    )
+    template.has_resource_properties(
+        "AWS::EC2::SecurityGroupIngress", {"FromPort": 5557, "ToPort": 5558}
+    )
+
+
+def test_master_and_workers(template: assertions.Template):
+    master = container(template, "Master")
+    command = master["Command"]
+    assert command[:3] == ["-f", "scenarios/odin_api.py", "--master"]
+    assert command[command.index("--expect-workers") + 1] == "8"
+    assert command[command.index("--users") + 1] == "800"
+    # The ALB target, through the NAT instance.
+    assert "Fn::Join" in command[command.index("--host") + 1]
+    environment = {e["Name"]: e["Value"] for e in master["Environment"]}
+    assert environment["ODIN_LOAD_TEST_SERVICES"] == (
+        "OdinLoadTestWorkers,OdinLoadTestMaster"
+    )
+    assert master["LogConfiguration"]["Options"]["mode"] == "non-blocking"
+
+    worker = container(template, "Worker")
+    assert worker["Command"][-4:] == [
+        "--master-host",
+        "master.loadtest.odin",
+        "--processes",
+        "2",
+    ]
+    assert worker["Image"] == master["Image"]
+
+
+def test_results_and_dashboard(template: assertions.Template):
+    template.resource_count_is("AWS::S3::Bucket", 1)
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {"Action": "ecs:UpdateService", "Effect": "Allow"}
+                        )
+                    ]
+                )
+            }
+        },
+    )
+    filters = template.find_resources("AWS::Logs::MetricFilter")
+    assert len(filters) == 6
+    template.has_resource_properties(
+        "AWS::CloudWatch::Dashboard", {"DashboardName": "OdinLoadTest"}
+    )
+
+
+def test_results_upload_through_s3_endpoint():
+    # Opened without the load test too, so a plain network deploy keeps it.
+    stacks = make_stacks()
+    network = assertions.Template.from_stack(stacks.network)
+    network.has_resource_properties(
+        "AWS::EC2::VPCEndpoint",
+        {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {
+                                "Action": ["s3:GetObject", "s3:PutObject"],
+                                "Resource": assertions.Match.array_with(
+                                    ["arn:aws:s3:::odin-smr-load-test-results/*"]
+                                ),
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
+    # The optional stack leaves the network stack alone.
+    with_load_test, stack = make_stacks_with_load_test(LoadTestSettings())
+    assert assertions.Template.from_stack(with_load_test.network).to_json() == (
+        network.to_json()
+    )
+    assert stack not in with_load_test.network.dependencies
+
+
+def test_cloudfront_target():
+    template = make_template(LoadTestSettings(target="cloudfront"))
+    command = container(template, "Master")["Command"]
+    assert command[command.index("--host") + 1] == "https://odin-smr.org"
+
+
+def test_settings_are_validated():
+    with pytest.raises(ValueError):
+        LoadTestSettings(target="nlb")
+    with pytest.raises(ValueError):
+        LoadTestSettings(scenario="missing")
+    with pytest.raises(ValueError):
+        LoadTestSettings(workers=10, users=5)
+
+
+def test_settings_from_context():
+    app = aws_cdk.App(context={"odin:load-test": '{"target": "cloudfront"}'})
+    settings = load_test_from_context(app.node)
+    assert settings == LoadTestSettings(target="cloudfront")
+    assert load_test_from_context(aws_cdk.App().node) is None
+    with pytest.raises(ValueError):
+        load_test_from_context(
+            aws_cdk.App(context={"odin:load-test": {"vus": 10}}).node
+        )
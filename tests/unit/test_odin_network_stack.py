@@ -0,0 +1,46 @@
+import aws_cdk.assertions as assertions
+
+from tests.unit.stacks import make_template
+
+
+def test_s3_gateway_endpoint(template: assertions.Template):
+    template.resource_count_is("AWS::EC2::VPCEndpoint", 1)
+    template.has_resource_properties(
+        "AWS::EC2::VPCEndpoint",
+        {
+            "VpcEndpointType": "Gateway",
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {
+                                "Resource": assertions.Match.array_with(
+                                    ["arn:aws:s3:::odin-era5/*"]
+                                )
+                            }
+                        ),
+                        assertions.Match.object_like(
+                            {
+                                "Action": "s3:GetObject",
+                                "Resource": "arn:aws:s3:::cdk-hnb659fds-assets"
+                                "-991049544436-eu-north-1/*",
+                            }
+                        ),
+                    ]
+                )
+            },
+        },
+    )
+
+
+def test_interface_endpoints():
+    template = make_template(interface_endpoints=True)
+    template.resource_count_is("AWS::EC2::VPCEndpoint", 5)
+    template.has_resource_properties(
+        "AWS::EC2::VPCEndpoint",
+        {
+            "VpcEndpointType": "Interface",
+            "ServiceName": "com.amazonaws.eu-north-1.ecr.dkr",
+            "PrivateDnsEnabled": True,
+        },
+    )
@@ -0,0 +1,132 @@
+import aws_cdk
+import aws_cdk.assertions as assertions
+from aws_cdk import aws_cloudfront as cloudfront
+from aws_cdk import aws_cloudfront_origins as origins
+from aws_cdk import aws_ec2 as ec2
+
+from odin_infrastructure.log_routing import LogSettings
+from odin_infrastructure.odin_cluster import RolloutProfile
+from odin_infrastructure.perf_lint import PerformanceChecks, suppress
+from tests.unit.stacks import ENV, OdinStacks, make_stacks
+
+
+def annotations(stack: aws_cdk.Stack) -> assertions.Annotations:
+    aws_cdk.Aspects.of(stack).add(PerformanceChecks())
+    return assertions.Annotations.from_stack(stack)
+
+
+def findings(found: list) -> dict[str, str]:
+    return {entry.id: entry.entry.data for entry in found}
+
+
+def make_odin_stacks(**kwargs) -> OdinStacks:
+    app = aws_cdk.App()
+    aws_cdk.Aspects.of(app).add(PerformanceChecks())
+    return make_stacks(app, **kwargs)
+
+
+def test_current_stacks():
+    errors: dict[str, str] = {}
+    warnings: dict[str, str] = {}
+    for stack in make_odin_stacks().all():
+        found = assertions.Annotations.from_stack(stack)
+        errors.update(findings(found.find_error("*", assertions.Match.any_value())))
+        warnings.update(findings(found.find_warning("*", assertions.Match.any_value())))
+    assert not errors
+    # mongod on t3.large is the only known finding, the uncached API catch-all
+    # /rest_api/* is suppressed.
+    assert list(warnings) == ["/OdinDataStack/OdinMongo/Resource"]
+    assert "[ack: OdinPerf3]" in warnings["/OdinDataStack/OdinMongo/Resource"]
+
+
+def test_slow_health_checks_and_blocking_logs():
+    stacks = make_odin_stacks(
+        api_rollout=RolloutProfile(
+            health_check_interval=aws_cdk.Duration.seconds(120),
+            health_check_timeout=aws_cdk.Duration.seconds(20),
+            unhealthy_threshold=7,
+            container_health_check_interval=aws_cdk.Duration.seconds(120),
+            container_health_check_timeout=aws_cdk.Duration.seconds(20),
+            container_health_check_retries=5,
+        ),
+        api_logging=LogSettings(non_blocking=False),
+    )
+    found = assertions.Annotations.from_stack(stacks.api)
+    errors = findings(found.find_error("*", assertions.Match.any_value()))
+    (error,) = errors.values()
+    assert error.startswith("[OdinPerf5] Health check every 120 s with 7 failures")
+    warnings = findings(found.find_warning("*", assertions.Match.any_value()))
+    (task_warning,) = [w for w in warnings.values() if "OdinPerf6" in w]
+    assert "OdinAPIContainer takes 600 s to be marked unhealthy" in task_warning
+    assert "OdinAPIContainer logs in blocking mode" in task_warning
+
+
+def make_nat_stack() -> tuple[aws_cdk.Stack, ec2.Vpc]:
+    stack = aws_cdk.Stack(aws_cdk.App(), "nat", env=ENV)
+    vpc = ec2.Vpc(
+        stack,
+        "Vpc",
+        nat_gateway_provider=ec2.NatProvider.instance_v2(
+            instance_type=ec2.InstanceType("t3.small")
+        ),
+        nat_gateways=1,
+        max_azs=1,
+    )
+    return stack, vpc
+
+
+def test_nat_instance_without_s3_endpoint():
+    stack, _ = make_nat_stack()
+    errors = findings(annotations(stack).find_error("*", assertions.Match.any_value()))
+    assert any(error.startswith("[OdinPerf2]") for error in errors.values())
+
+    stack, vpc = make_nat_stack()
+    vpc.add_gateway_endpoint("S3", service=ec2.GatewayVpcEndpointAwsService.S3)
+    annotations(stack).has_no_error("*", assertions.Match.any_value())
+
+
+def test_suppression():
+    stack, vpc = make_nat_stack()
+    suppress(vpc, "OdinPerf2", "Test VPC without S3 traffic")
+    annotations(stack).has_no_error("*", assertions.Match.any_value())
+
+
+def test_caching_disabled_on_reads():
+    stack = aws_cdk.Stack(aws_cdk.App(), "cdn", env=ENV)
+    cloudfront.Distribution(
+        stack,
+        "Distribution",
+        default_behavior=cloudfront.BehaviorOptions(
+            origin=origins.HttpOrigin("api.example.com"),
+            cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
+        ),
+    )
+    annotations(stack).has_warning(
+        "/cdn/Distribution/Resource",
+        assertions.Match.string_like_regexp("CACHING_DISABLED on read-only"),
+    )
+
+
+def test_caching_disabled_suppressed_for_one_path():
+    stack = aws_cdk.Stack(aws_cdk.App(), "cdn", env=ENV)
+    api = origins.HttpOrigin("api.example.com")
+    distribution = cloudfront.Distribution(
+        stack,
+        "Distribution",
+        default_behavior=cloudfront.BehaviorOptions(
+            origin=origins.HttpOrigin("ui.example.com")
+        ),
+        additional_behaviors={
+            # A cached path switched to CACHING_DISABLED by mistake.
+            "/rest_api/*/level2/*": cloudfront.BehaviorOptions(
+                origin=api, cache_policy=cloudfront.CachePolicy.CACHING_DISABLED
+            ),
+            "/rest_api/*": cloudfront.BehaviorOptions(
+                origin=api, cache_policy=cloudfront.CachePolicy.CACHING_DISABLED
+            ),
+        },
+    )
+    suppress(distribution, "OdinPerf1", "Uncached catch-all", "/rest_api/*")
+    found = annotations(stack).find_warning("*", assertions.Match.any_value())
+    (warning,) = findings(found).values()
+    assert "read-only behaviours /rest_api/*/level2/*," in warning